@@ -2,7 +2,18 @@
 import streamlit as st
 import pandas as pd
 import pm4py
-import tempfile
+from dotenv import load_dotenv
+
+# Integrating utility functions
+from utils.ingest import STANDARD_KEYS, open_upload, read_csv_chunked, read_xes_stream, to_standard_columns
+from utils.event_log import build_event_log
+from utils.log_profile import build_log_profile
+from utils.log_cache import content_key, load_cached_log, store_cached_log, list_cached_logs, purge_cached_logs
+from utils.model_cache import purge_cached_models
+from utils.process_exploration import precompute_bpmn_models
+
+# Cache location & budget can be configured via .env
+load_dotenv()
 
 # Setting up the streamlit page
 st.set_page_config(page_title = "AID4DE", layout ="wide")
@@ -10,7 +21,13 @@ st.title("👋 Welcome")
 st.markdown("""Welcome to **AID4DE** - your tool to validate event log data for Process Mining!
             Please upload an event log and at least one analysis question to check the validity of your event log for its intended analytical purpose!""")
 
-uploaded_file = st.file_uploader("Upload your CSV or XES file", type=["csv", "xes"])
+uploaded_file = st.file_uploader("Upload your CSV or XES file", type=["csv", "xes", "gz", "zip", "zst"])
+
+# Column mappings per file type
+COLUMN_MAPPINGS = {
+    ".csv": {"case_id_key": "Case ID", "activity_key": "Activity", "timestamp_key": "Complete Timestamp", "resource_key": "Resource"},
+    ".xes": {"case_id_key": "case:concept:name", "activity_key": "concept:name", "timestamp_key": "time:timestamp", "resource_key": "org:resource"},
+}
 
 # If a file is uploaded: process it
 if uploaded_file is not None and "uploaded_file_name" not in st.session_state:
@@ -20,50 +37,57 @@ if uploaded_file is not None and "uploaded_file_name" not in st.session_state:
         progress_bar = progress_placeholder.progress(0)
 
         with st.spinner("Uploading and processing file..."):
-        
-            # Preprocessing of the csv file
-            if uploaded_file.name.endswith(".csv"):
-                df_raw = pd.read_csv(uploaded_file)
-                st.session_state.df_raw = df_raw
-                progress_bar.progress(30)
-                case_id_key = 'Case ID'
-                if 'case_id_key' not in st.session_state:
-                    st.session_state.case_id_key = case_id_key
-                activity_key = 'Activity'
-                if 'activity_key' not in st.session_state:
-                    st.session_state.activity_key = activity_key
-                timestamp_key = 'Complete Timestamp'
-                if 'timestamp_key' not in st.session_state:
-                    st.session_state.timestamp_key = timestamp_key
-                resource_key = 'Resource'
-                if 'resource_key' not in st.session_state:
-                    st.session_state.resource_key = resource_key
-                df = pm4py.format_dataframe(df_raw, case_id_key, activity_key, timestamp_key, resource_key)
-            # Preprocessing of the xes file
-            elif uploaded_file.name.endswith(".xes"):
-                with tempfile.NamedTemporaryFile(delete=False, suffix = ".xes") as tmp_file:
-                    tmp_file.write(uploaded_file.read())
-                    tmp_file_path = tmp_file.name
-                progress_bar.progress(30)
-                case_id_key = 'case:concept:name'
-                if 'case_id_key' not in st.session_state:
-                    st.session_state.case_id_key = case_id_key
-                activity_key = 'concept:name'
-                if 'activity_key' not in st.session_state:
-                    st.session_state.activity_key = activity_key
-                timestamp_key = 'time:timestamp'
-                if 'timestamp_key' not in st.session_state:
-                    st.session_state.timestamp_key = timestamp_key
-                resource_key = 'org:resource'
-                if 'resource_key' not in st.session_state:
-                    st.session_state.resource_key = resource_key
-                df_raw = pm4py.read_xes(tmp_file_path)
-                st.session_state.df_raw = df_raw
-                progress_bar.progress(60)
-                df = pm4py.format_dataframe(df_raw, case_id_key, activity_key, timestamp_key, resource_key)
-            else:
-                st.warning("❗ The uploaded file must be in .csv or .xes format.")
+
+            # Archives (.gz/.zip/.zst) are decompressed on the fly while parsing
+            log_stream, suffix = open_upload(
+                uploaded_file,
+                uploaded_file.name,
+                total_bytes=uploaded_file.size,
+                progress=lambda share: progress_bar.progress(int(share * 60)),
+            )
+            if suffix not in COLUMN_MAPPINGS:
+                st.warning("❗ The uploaded file must be in .csv or .xes format (optionally compressed as .gz, .zip or .zst).")
                 st.stop()
+            mapping = COLUMN_MAPPINGS[suffix]
+
+            # Known logs are served from the on-disk cache (hash of the uploaded, possibly compressed bytes)
+            cache_key = content_key(uploaded_file, {"format": suffix, **mapping})
+            st.session_state.dataset_fingerprint = cache_key
+            df = load_cached_log(cache_key)
+            from_cache = df is not None
+            if from_cache:
+                progress_bar.progress(60)
+
+            # Preprocessing of the csv file (chunked, categorical key columns, explicit timestamp format)
+            elif suffix == ".csv":
+                df_raw = read_csv_chunked(log_stream, **mapping)
+            # Preprocessing of the xes file (parsing the upload stream directly)
+            elif suffix == ".xes":
+                df_raw = read_xes_stream(log_stream)
+
+            if not from_cache:
+                # Key columns are renamed to pm4py's standard names, so formatting does not duplicate them
+                df_raw = to_standard_columns(df_raw, mapping)
+                progress_bar.progress(60)
+                df = pm4py.format_dataframe(
+                    df_raw,
+                    case_id=STANDARD_KEYS["case_id_key"],
+                    activity_key=STANDARD_KEYS["activity_key"],
+                    timestamp_key=STANDARD_KEYS["timestamp_key"],
+                )
+                # Only the formatted log is kept
+                del df_raw
+
+            for state_key, column in STANDARD_KEYS.items():
+                st.session_state[state_key] = column
+
+            if not from_cache:
+                store_cached_log(cache_key, df, file_name=uploaded_file.name, mapping=mapping)
+            progress_bar.progress(80)
+
+            # Dictionary-encoded view of the log and its profile, shared by all pages
+            event_log = build_event_log(df, **STANDARD_KEYS)
+            log_profile = build_log_profile(event_log, fingerprint=cache_key)
         
             # Update progress bar
             progress_bar.progress(100)
@@ -73,8 +97,13 @@ if uploaded_file is not None and "uploaded_file_name" not in st.session_state:
         
         # Update the session state
         st.session_state.df = df
+        st.session_state.event_log = event_log
+        st.session_state.log_profile = log_profile
         st.session_state.uploaded_file_name = uploaded_file.name
 
+        # Process models for all coverage slider positions are discovered in the background
+        precompute_bpmn_models(df, log_profile, fingerprint=cache_key)
+
     # Showing the generated exception
     except Exception as e:
         st.error(f"❌ Error: {e}")
@@ -85,6 +114,30 @@ if "uploaded_file_name" in st.session_state:
     st.info(f"Current file: **{st.session_state.uploaded_file_name}**")
     st.dataframe(st.session_state.df.head(), use_container_width=True)
 
+# Managing the on-disk cache of parsed event logs
+with st.expander("🗄️ Cached event logs"):
+    cached = list_cached_logs()
+    if cached:
+        st.dataframe(pd.DataFrame([{
+            "File": e["file_name"],
+            "Events": e["rows"],
+            "Size [MB]": round(e["size_bytes"] / 1024 ** 2, 1),
+            "Last used": pd.Timestamp(e["last_used"], unit="s").strftime("%d/%m/%Y %H:%M"),
+        } for e in cached]), hide_index=True, use_container_width=True)
+        labels = {f"{e['file_name']} ({e['key'][:8]})": e["key"] for e in cached}
+        to_purge = st.multiselect("Select cached logs to remove:", list(labels))
+        col_sel, col_all = st.columns(2)
+        if col_sel.button("Remove selected", disabled=not to_purge):
+            purge_cached_logs([labels[l] for l in to_purge])
+            purge_cached_models([labels[l] for l in to_purge])
+            st.rerun()
+        if col_all.button("Purge cache"):
+            purge_cached_logs()
+            purge_cached_models()
+            st.rerun()
+    else:
+        st.caption("No event logs cached yet.")
+
 # Text area for analysis question
 question = st.text_area("Analysis question:")
 if question:
@@ -78,13 +78,17 @@ def _shrink(obj, max_items_per_section=20, max_string_len=200):
 
 def build_viz_context(max_items_per_section=20, max_string_len=200, pretty=False):
     """
-    Build a compact JSON context from st.session_state.viz_data.
+    Build a compact JSON context from st.session_state.viz_data and the log profile.
     Always returns a JSON string (possibly empty object).
     """
     viz_data = st.session_state.get("viz_data", {})
     compact = _shrink(viz_data, max_items_per_section, max_string_len)
+    context = {"viz_meta": compact}
+    profile = st.session_state.get("log_profile")
+    if profile is not None:
+        context["log_profile"] = _shrink(profile.summary(), max_items_per_section, max_string_len)
     return json.dumps(
-        {"viz_meta": compact},
+        context,
         ensure_ascii=False,
         separators=None if pretty else (",", ":")
     )
@@ -125,7 +129,7 @@ st.title("🔍 Initial Data Exploration")
 st.markdown("""The Initial Data Exploration mode enables you to get first insights into the uploaded event dataset""")
 
 # Sending error message if no event dataset and analysis question are uploaded
-if "df" not in st.session_state or "question_data" not in st.session_state:
+if "event_log" not in st.session_state or "question_data" not in st.session_state:
     st.error("Please upload data and provide a question on the main page.")
     st.stop()
 
@@ -167,4 +171,4 @@ with st.sidebar:
 st.subheader("📈 Graphics")
 
 # Generating the visualizations to explore the event data
-visualize_data(st.session_state["df"], st.session_state["case_id_key"], st.session_state["activity_key"], st.session_state["timestamp_key"], st.session_state["resource_key"])
+visualize_data(st.session_state["df"], st.session_state["event_log"], st.session_state["log_profile"], st.session_state["case_id_key"], st.session_state["activity_key"], st.session_state["timestamp_key"], st.session_state["resource_key"])
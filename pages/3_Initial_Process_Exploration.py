@@ -8,11 +8,15 @@ from openai import AzureOpenAI
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Integrating utility functions
-from utils.state import init_session_state, feedback_input, attach_text_to_visual
+from utils.state import init_session_state, feedback_input, attach_text_to_visual, dataset_fingerprint
 from utils.media import register_dataframe_as_image
+from utils.model_cache import DEFAULT_COVERAGE
+from utils.directly_follows import compute_directly_follows
 from utils.process_exploration import (
     filter_variants_for_coverage,
     discover_bpmn_and_register,
+    wait_for_model,
+    render_model_fitness,
     build_process_stats,
     render_declare_model,
     discover_footprints_and_register,
@@ -24,14 +28,13 @@ init_session_state()
 st.title("Initial Process Exploration")
 st.markdown("The Initial Process Exploration enables you to get insights into the process of the logged event data!")
 
-if "df" not in st.session_state or "question_data" not in st.session_state:
+if "log_profile" not in st.session_state or "question_data" not in st.session_state:
     st.error("Please upload data and provide a question on the main page.")
     st.stop()
 
 df = st.session_state["df"]
-case_id_key = st.session_state["case_id_key"]
-activity_key = st.session_state["activity_key"]
-timestamp_key = st.session_state["timestamp_key"]
+profile = st.session_state["log_profile"]
+fingerprint = dataset_fingerprint()
 
 load_dotenv()
 client = AzureOpenAI(
@@ -40,36 +43,49 @@ client = AzureOpenAI(
     api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
 )
 
-coverage = st.slider("Select variant coverage threshold (%) for process model:", 50, 100, 80, 10) / 100.0
+coverage = st.slider("Select variant coverage threshold (%) for process model:", 50, 100, int(DEFAULT_COVERAGE * 100), 10) / 100.0
 
-filtered_df = filter_variants_for_coverage(
-    df, coverage_threshold=coverage,
-    case_id_key=case_id_key, activity_key=activity_key, timestamp_key=timestamp_key
-)
+filtered_df, case_mask = filter_variants_for_coverage(df, coverage_threshold=coverage, profile=profile)
+# Directly-follows relation of the retained cases, shared by the preview, the stats and the footprints
+dfg = compute_directly_follows(st.session_state["event_log"], case_mask)
 
 # --- BPMN Model ---
-bpmn_png_path = discover_bpmn_and_register(
+# A directly-follows preview is shown while the BPMN model is discovered; it stays if the
+# discovery exceeds the time budget
+model_col, fitness_col = st.columns([4, 1])
+model_slot = model_col.empty()
+model_png, model_kind = discover_bpmn_and_register(
     filtered_df,
-    case_id_key=case_id_key, activity_key=activity_key, timestamp_key=timestamp_key,
-    coverage_threshold=coverage
+    dfg=dfg, profile=profile, case_mask=case_mask,
+    coverage_threshold=coverage, fingerprint=fingerprint, slot=model_slot,
 )
-st.image(bpmn_png_path, caption=f"Filtered process model ({int(coverage*100)}% coverage)")
+if model_kind == "dfg":
+    st.warning(
+        "Discovering the BPMN model takes longer than the time budget, so the directly-follows graph "
+        "of the most frequent paths is shown instead. The BPMN model keeps being discovered in the "
+        "background and replaces the graph once it is ready."
+    )
+    wait_for_model("bpmn", fingerprint, coverage)
 
-st.markdown("---")
+# Fitness of the model against all cases, including the ones filtered out above
+with fitness_col:
+    if model_kind == "bpmn":
+        render_model_fitness(filtered_df, profile, coverage_threshold=coverage, fingerprint=fingerprint)
+    else:
+        st.info("The fitness of the model is shown once the BPMN model is ready.")
 
-# LLM explanation for BPMN
-def encode_image_to_base64(image_path: str) -> str:
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+st.markdown("---")
 
-base64_image = encode_image_to_base64(bpmn_png_path)
+# LLM explanation for the process model
+model_name = "BPMN diagram" if model_kind == "bpmn" else "directly-follows graph"
+base64_image = base64.b64encode(model_png).decode("utf-8")
 with st.spinner("Generating an explanation of the process model in natural language ..."):
     completion = client.chat.completions.create(
         model=os.getenv("AZURE_OPENAI_MODEL"),
         messages=[
-            {"role": "system", "content": "You are an expert in process science. Explain BPMN models clearly and concisely."},
+            {"role": "system", "content": "You are an expert in process science. Explain process models (BPMN models and directly-follows graphs) clearly and concisely."},
             {"role": "user", "content": [
-                {"type": "text", "text": "Please explain the process shown in the following BPMN diagram."},
+                {"type": "text", "text": f"Please explain the process shown in the following {model_name}."},
                 {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}},
             ]},
         ],
@@ -81,37 +97,37 @@ st.markdown(explanation)
 
 attach_text_to_visual("proc_bpmn_filtered", "Model Description", kind="note", text=explanation)
 fb_key_bpmn = "feedback_process_model"; fb_label_bpmn = "Does the process model & its description reflect your experience?"
-feedback_input(fb_label_bpmn, fb_key_bpmn)
-attach_text_to_visual("proc_bpmn_filtered", fb_label_bpmn, kind="feedback", from_input_key=fb_key_bpmn)
+feedback_input(fb_label_bpmn, fb_key_bpmn, viz_key="proc_bpmn_filtered")
 
 st.markdown("---")
 
 # --- Stats ---
 st.markdown("### 📊 Statistics about the process model")
-stats_df = build_process_stats(filtered_df, case_id_key=case_id_key, activity_key=activity_key, timestamp_key=timestamp_key)
+stats_df = build_process_stats(profile, case_mask=case_mask, dfg=dfg)
 st.dataframe(stats_df, hide_index=True)
 
 register_dataframe_as_image(stats_df, key="proc_stats_summary", title="Process-centric statistics")
 fb_key_stats = "feedback_process_centric_statistics"; fb_label_stats = "Do the statistics reflect your experience?"
-feedback_input(fb_label_stats, fb_key_stats)
-attach_text_to_visual("proc_stats_summary", fb_label_stats, kind="feedback", from_input_key=fb_key_stats)
+feedback_input(fb_label_stats, fb_key_stats, viz_key="proc_stats_summary")
 
 st.markdown("---")
 
 # --- DECLARE Model ---
 st.markdown("### DECLARE model of the event log")
-render_declare_model(filtered_df)
+render_declare_model(
+    st.session_state["event_log"], profile,
+    case_mask=case_mask, coverage_threshold=coverage, fingerprint=fingerprint,
+)
 
 fb_key_decl = "feedback_declare_model"
 fb_label_decl = "Does the DECLARE Model reflect your experience?"
-feedback_input(fb_label_decl, fb_key_decl)
-attach_text_to_visual("proc_declare_summary", fb_label_decl, kind="feedback", from_input_key=fb_key_decl)
+feedback_input(fb_label_decl, fb_key_decl, viz_key="proc_declare_summary")
 
 st.markdown("---")
 
 # --- Footprints ---
 st.markdown("### Footprint model of the event log")
-discover_footprints_and_register(filtered_df, coverage_threshold=coverage)
+discover_footprints_and_register(dfg, coverage_threshold=coverage, fingerprint=fingerprint)
 
 legend_text = (
     "**Legend (row → column):**\n"
@@ -124,5 +140,4 @@ st.info(legend_text)
 
 attach_text_to_visual("proc_footprints_filtered", "Legend", kind="legend", text=legend_text)
 fb_key_fp = "feedback_footprint_model"; fb_label_fp = "Does the footprint model reflect your experience?"
-feedback_input(fb_label_fp, fb_key_fp)
-attach_text_to_visual("proc_footprints_filtered", fb_label_fp, kind="feedback", from_input_key=fb_key_fp)
+feedback_input(fb_label_fp, fb_key_fp, viz_key="proc_footprints_filtered")
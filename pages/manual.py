@@ -37,6 +37,8 @@ Below is a step-by-step guide to navigate through the six main pages of the app.
 
 ### 2️⃣ **Initial Data Exploration**
 - Generates a **set of predefined visualizations** automatically, including activity, resource, and case distributions.
+- Visualizations are grouped into analysis sections; switch a section on to compute it. Only switched-on sections are included in the chatbot context and the PDF report; switching a section off removes its visualizations again.
+- All sections are off in a new session, so until you switch sections on, the report only contains the summary statistics.
 - Allows you to provide **qualitative feedback** directly below each visualization.
 - This stage establishes a **first understanding** of your dataset.
 
@@ -0,0 +1,6 @@
+# utils/_render_worker.py
+# Main module of the render pool's worker processes (see utils/render_pool.py): a spawned
+# worker imports this module instead of the page that Streamlit runs as __main__ in the server.
+# Importing the figure builders loads the plotting stack before the first task arrives.
+
+import utils.charts  # noqa: F401
@@ -0,0 +1,111 @@
+# utils/charts.py
+from __future__ import annotations
+
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LogNorm, Normalize
+import seaborn as sns
+
+# Figure builders for the predefined charts. They take small, pre-aggregated inputs (labels,
+# counts, bin edges, ...) and return a Matplotlib figure. The module has no Streamlit
+# dependency, so the builders can run in the render pool's worker processes (see render_pool.py).
+
+def bar_chart(labels, values, *, title: str, xlabel: str, ylabel: str, color: str = "skyblue", figsize=(10, 5),
+              rotation: int = 45):
+    """Bars for categorical labels, labels rotated below the axis (rotation=0: upright, 90: vertical)."""
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.bar(range(len(labels)), values, color=color, edgecolor='black')
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels, rotation=rotation, ha="right" if 0 < rotation < 90 else "center")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return fig
+
+def count_bar_chart(x, counts, *, title: str, xlabel: str, ylabel: str, color: str = "skyblue", figsize=(10, 6)):
+    """Bars over integer x values (e.g. case lengths), one tick per bar."""
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.bar(x, counts, color=color, edgecolor='black')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.set_xticks(x)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    return fig
+
+def histogram_chart(edges, counts, *, title: str, xlabel: str, ylabel: str, marker: float | None = None,
+                    marker_label: str | None = None, color: str = "skyblue", figsize=(12, 6)):
+    """Pre-binned histogram (bin edges + counts) with an optional vertical marker line."""
+    edges = np.asarray(edges, dtype=float)
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, edgecolor='black')
+    if marker is not None:
+        ax.axvline(marker, color="darkred", linestyle="--", label=marker_label)
+        ax.legend()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return fig
+
+def time_series_chart(times, values, *, title: str, xlabel: str, ylabel: str, color: str = "steelblue",
+                      figsize=(12, 5)):
+    """Line over time (datetime64 x values) with the area below it filled."""
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.plot(times, values, color=color, linewidth=1)
+    ax.fill_between(times, values, color=color, alpha=0.25)
+    ax.set_ylim(bottom=0)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.autofmt_xdate()
+    return fig
+
+def density_chart(counts, *, x_start, x_end, y_start: int, y_end: int, title: str, xlabel: str, ylabel: str,
+                  cbar_label: str, figsize=(12, 6)):
+    """Count grid drawn as an image over a time axis (x_start/x_end datetime64), log color scale from 10 up."""
+    counts = np.ma.masked_equal(np.asarray(counts), 0)
+    cmap = plt.get_cmap("viridis").copy()
+    cmap.set_bad("white")
+    fig, ax = plt.subplots(figsize=figsize)
+    extent = (mdates.date2num(x_start), mdates.date2num(x_end), y_start, y_end)
+    peak = int(counts.max() or 1)
+    norm = LogNorm(vmin=1, vmax=peak) if peak >= 10 else Normalize(vmin=1, vmax=max(peak, 2))
+    image = ax.imshow(counts, origin="lower", aspect="auto", extent=extent, cmap=cmap, norm=norm,
+                      interpolation="nearest")
+    ax.xaxis_date()
+    fig.colorbar(image, ax=ax, label=cbar_label, format="%g")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    fig.autofmt_xdate()
+    return fig
+
+def heatmap_chart(values, row_labels, col_labels, *, title: str, xlabel: str, ylabel: str,
+                  cbar_label: str, figsize=(12, 8)):
+    """Annotated heatmap of a small matrix (rows x columns)."""
+    fig, ax = plt.subplots(figsize=figsize)
+    sns.heatmap(np.asarray(values), annot=True, fmt=".1f", cmap="YlGnBu", linewidths=0.5,
+                xticklabels=col_labels, yticklabels=row_labels, cbar_kws={'label': cbar_label}, ax=ax)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
+    return fig
+
+def render_png(builder, inputs: dict, dpi: int = 150) -> bytes:
+    """Build a figure from `inputs` and return it as PNG bytes (runs in worker processes)."""
+    fig = builder(**inputs)
+    try:
+        bio = BytesIO()
+        fig.savefig(bio, format="png", dpi=dpi, bbox_inches="tight")
+        return bio.getvalue()
+    finally:
+        plt.close(fig)
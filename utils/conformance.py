@@ -0,0 +1,96 @@
+# utils/conformance.py
+from __future__ import annotations
+
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+import pm4py
+from pm4py.algo.conformance.tokenreplay.variants import token_replay
+
+from utils.log_profile import LogProfile
+from utils.render_pool import pool_workers, submit_task
+
+# Token-based replay of a discovered model against the whole log, at the variant level: all
+# cases of a variant replay identically, so every distinct variant is replayed once and its
+# diagnostics are weighted by the number of cases of the variant. The variants are split into
+# chunks that are replayed in parallel in the worker pool (see render_pool.submit_task).
+# Aggregation follows pm4py.fitness_token_based_replay, so the numbers equal a per-case replay.
+
+# Chunks per worker, so that a chunk of slow variants does not hold up the others
+_CHUNKS_PER_WORKER = 4
+
+@dataclass(frozen=True)
+class VariantReplay:
+    is_fit: np.ndarray          # bool, per variant index
+    trace_fitness: np.ndarray   # float64, per variant index
+    missing: np.ndarray         # int64 tokens, per variant index
+    consumed: np.ndarray
+    remaining: np.ndarray
+    produced: np.ndarray
+
+    def fitness(self, weights: np.ndarray) -> dict:
+        """
+        Fitness of the cases given by `weights` (cases per variant index), with the keys and
+        formulas of pm4py.fitness_token_based_replay plus the number of cases.
+        """
+        n_cases = int(weights.sum())
+        consumed, produced = int(weights @ self.consumed), int(weights @ self.produced)
+        result = {"cases": n_cases, "perc_fit_traces": 0.0, "average_trace_fitness": 0.0, "log_fitness": 0.0}
+        if n_cases > 0 and consumed > 0 and produced > 0:
+            result["perc_fit_traces"] = 100.0 * int(weights @ self.is_fit) / n_cases
+            result["average_trace_fitness"] = float(weights @ self.trace_fitness) / n_cases
+            result["log_fitness"] = (0.5 * (1 - int(weights @ self.missing) / consumed)
+                                     + 0.5 * (1 - int(weights @ self.remaining) / produced))
+        result["percentage_of_fitting_traces"] = result["perc_fit_traces"]
+        return result
+
+def _replay_chunk(net, initial_marking, final_marking, sequences: list[tuple]) -> np.ndarray:
+    """(n, 6) diagnostics per sequence: fit, trace fitness, missing, consumed, remaining, produced."""
+    replayed = token_replay.apply_variants_list(
+        [(seq, 1) for seq in sequences], net, initial_marking, final_marking,
+        parameters={"show_progress_bar": False},
+    )
+    return np.array([
+        (r["trace_is_fit"], r["trace_fitness"], r["missing_tokens"], r["consumed_tokens"],
+         r["remaining_tokens"], r["produced_tokens"])
+        for r in replayed
+    ], dtype=np.float64).reshape(-1, 6)
+
+def replay_variants(net, initial_marking, final_marking, sequences: list[tuple]) -> VariantReplay:
+    """Replay every sequence once on the Petri net, in parallel chunks."""
+    n_chunks = max(1, min(len(sequences), pool_workers() * _CHUNKS_PER_WORKER))
+    chunks = [list(c) for c in np.array_split(np.arange(len(sequences)), n_chunks) if len(c)]
+    args = [(net, initial_marking, final_marking, [sequences[i] for i in c]) for c in chunks]
+    futures = [submit_task(_replay_chunk, *a) for a in args]
+    try:
+        parts = [f.result() for f in futures]
+    except BrokenProcessPool:
+        parts = [_replay_chunk(*a) for a in args]
+    rows = np.vstack(parts) if parts else np.zeros((0, 6))
+    return VariantReplay(
+        is_fit=rows[:, 0].astype(bool),
+        trace_fitness=rows[:, 1],
+        missing=rows[:, 2].astype(np.int64),
+        consumed=rows[:, 3].astype(np.int64),
+        remaining=rows[:, 4].astype(np.int64),
+        produced=rows[:, 5].astype(np.int64),
+    )
+
+def model_fitness(bpmn, profile: LogProfile, n_retained_variants: int) -> dict[str, dict]:
+    """
+    Token-replay fitness of a BPMN model against all cases of the log, and separately against
+    the cases of the `n_retained_variants` most frequent variants (the ones the model was
+    discovered from) and the remaining, filtered-out cases.
+    """
+    net, initial_marking, final_marking = pm4py.convert_to_petri_net(bpmn)
+    replay = replay_variants(net, initial_marking, final_marking, profile.variant_sequences)
+
+    retained = np.zeros(profile.n_variants, dtype=bool)
+    retained[profile.case_variant[profile.case_rank < n_retained_variants]] = True
+    counts = profile.variant_counts
+    return {
+        "all": replay.fitness(counts),
+        "retained": replay.fitness(np.where(retained, counts, 0)),
+        "filtered_out": replay.fitness(np.where(retained, 0, counts)),
+    }
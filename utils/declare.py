@@ -0,0 +1,201 @@
+# utils/declare.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from pm4py.algo.discovery.declare.variants.classic import form_rules_table
+from pm4py.objects.log.obj import Event, EventLog as Pm4pyEventLog, Trace
+
+from utils.event_log import EventLog
+from utils.log_profile import LogProfile
+
+# DECLARE discovery restricted to the templates the app shows, with the semantics of
+# pm4py.discover_declare (classic variant): every case is a row of a case x activity occurrence
+# matrix holding the position of the first and the last occurrence of each activity. Cases of the
+# same variant have identical rows, so one row per variant is built and weighted by its cases.
+# The matrix is sparse (a case contains few of the activities); pair templates are evaluated
+# over the activity pairs that co-occur in a row, generated in bounded chunks and summed with
+# weighted bincounts into support and confidence per pair.
+#
+# Support and confidence follow pm4py: a rule's support is the number of cases in which it is
+# activated, its confidence the number of those cases in which it holds.
+#   existence(a):     support = all cases,            confidence = cases containing a
+#   response(a, b):   support = cases containing a,   confidence = ... whose last a precedes their last b
+#   precedence(a, b): support = cases containing both, confidence = ... whose first a precedes their first b
+# Without explicit thresholds, pm4py takes the minimum support and confidence ratios from the
+# best rule (support ratio x confidence ratio) over all of its default templates, absence,
+# init, chain and alternate templates included, times AUTO_SELECTION_MULTIPLIER. When an
+# activity occurs in every case its existence rule scores the maximum of 1; otherwise the
+# ratios are taken from pm4py's own rules table, built over one trace per variant (see _auto_ratios).
+
+DECLARE_TEMPLATES = ("existence", "response", "precedence")
+AUTO_SELECTION_MULTIPLIER = 0.8
+
+# Upper bound of activity pairs materialized at once
+_PAIR_CHUNK = 1 << 22
+
+@dataclass(frozen=True)
+class OccurrenceMatrix:
+    """Sparse variant x activity occurrence matrix: one entry per activity occurring in a row."""
+    variants: np.ndarray    # int64 variant index, per row
+    weights: np.ndarray     # int64 number of cases, per row (variant)
+    offsets: np.ndarray     # int64 CSR offsets of the entries of each row
+    activities: np.ndarray  # int64 activity code, per entry (ascending within a row)
+    first: np.ndarray       # int64 position of the first occurrence in the case, per entry
+    last: np.ndarray        # int64 position of the last occurrence in the case, per entry
+
+    @property
+    def n_rows(self) -> int:
+        return int(len(self.weights))
+
+    @property
+    def n_cases(self) -> int:
+        return int(self.weights.sum())
+
+    @property
+    def row_sizes(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+def occurrence_matrix(log: EventLog, profile: LogProfile, case_mask: np.ndarray | None = None) -> OccurrenceMatrix:
+    """Occurrence matrix of the variants of the cases in `case_mask` (all cases if None)."""
+    retained = np.arange(log.n_cases) if case_mask is None else np.flatnonzero(case_mask)
+    variants, first_case, weights = np.unique(profile.case_variant[retained], return_index=True, return_counts=True)
+    row_of_case = np.full(log.n_cases, -1, dtype=np.int64)
+    row_of_case[retained[first_case]] = np.arange(len(first_case))
+
+    event_row = log.cases.expand(row_of_case)
+    selected = event_row >= 0
+    n_act = np.int64(log.n_activities)
+    keys = event_row[selected] * n_act + log.activity_codes[selected]
+    positions = log.cases.position_in_case()[selected]
+
+    # A stable sort groups the events by (row, activity) and keeps them in case order
+    order = np.argsort(keys, kind="stable")
+    keys, positions = keys[order], positions[order]
+    group_start = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+    group_end = np.r_[group_start[1:], len(keys)]
+
+    entry_rows = keys[group_start] // n_act
+    offsets = np.searchsorted(entry_rows, np.arange(len(weights) + 1), side="left")
+    return OccurrenceMatrix(
+        variants=variants.astype(np.int64),
+        weights=weights.astype(np.int64),
+        offsets=offsets.astype(np.int64),
+        activities=keys[group_start] % n_act,
+        first=positions[group_start],
+        last=positions[group_end - 1],
+    )
+
+def _pair_counts(occ: OccurrenceMatrix, n_act: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (n_act, n_act) case counts over the ordered pairs (a, b), a != b, of each row: cases
+    containing both, cases whose last a precedes their last b, cases whose first a precedes their first b.
+    """
+    together, last_before, first_before = (np.zeros(n_act * n_act) for _ in range(3))
+    sizes = occ.row_sizes
+    pairs_per_row = sizes * sizes
+    cum_pairs = np.cumsum(pairs_per_row)
+    row = 0
+    while row < occ.n_rows:
+        # Rows [row, stop) hold at most _PAIR_CHUNK pairs (or a single larger row)
+        done = int(cum_pairs[row - 1]) if row else 0
+        stop = max(int(np.searchsorted(cum_pairs, done + _PAIR_CHUNK, side="right")), row + 1)
+        k, kk = sizes[row:stop], pairs_per_row[row:stop]
+        local = np.arange(int(kk.sum())) - np.repeat(np.cumsum(kk) - kk, kk)
+        k_rep = np.repeat(k, kk)
+        start = np.repeat(occ.offsets[row:stop], kk)
+        left, right = start + local // k_rep, start + local % k_rep
+        distinct = left != right
+        left, right = left[distinct], right[distinct]
+        weights = np.repeat(occ.weights[row:stop], kk)[distinct]
+
+        codes = occ.activities[left] * n_act + occ.activities[right]
+        together += np.bincount(codes, weights=weights, minlength=n_act * n_act)
+        hit = occ.last[left] < occ.last[right]
+        last_before += np.bincount(codes[hit], weights=weights[hit], minlength=n_act * n_act)
+        hit = occ.first[left] < occ.first[right]
+        first_before += np.bincount(codes[hit], weights=weights[hit], minlength=n_act * n_act)
+        row = stop
+    return tuple(np.rint(c).astype(np.int64).reshape(n_act, n_act) for c in (together, last_before, first_before))
+
+def _template_rules(occ: OccurrenceMatrix, n_act: int, templates: tuple) -> dict[str, tuple]:
+    """template -> (activity code arrays of the rules, support, confidence), for every candidate rule."""
+    cases_with = np.bincount(occ.activities, weights=np.repeat(occ.weights, occ.row_sizes), minlength=n_act)
+    cases_with = np.rint(cases_with).astype(np.int64)
+    present = np.flatnonzero(cases_with)
+    rules = {}
+    if "existence" in templates:
+        rules["existence"] = ((present,), np.full(len(present), occ.n_cases, dtype=np.int64), cases_with[present])
+    if "response" in templates or "precedence" in templates:
+        together, last_before, first_before = _pair_counts(occ, n_act)
+        a, b = (x.ravel() for x in np.meshgrid(present, present, indexing="ij"))
+        a, b = a[a != b], b[a != b]
+        if "response" in templates:
+            rules["response"] = ((a, b), cases_with[a], last_before[a, b])
+        if "precedence" in templates:
+            rules["precedence"] = ((a, b), together[a, b], first_before[a, b])
+    return rules
+
+def _auto_ratios(occ: OccurrenceMatrix, profile: LogProfile, n_act: int) -> tuple[float, float]:
+    """
+    Minimum support and confidence ratios of pm4py's automatic selection: those of the rule with
+    the highest support ratio x confidence ratio over all default templates (ties broken by the
+    largest column key), times AUTO_SELECTION_MULTIPLIER.
+    """
+    cases_with = np.bincount(occ.activities, weights=np.repeat(occ.weights, occ.row_sizes), minlength=n_act)
+    if np.any(np.rint(cases_with) == occ.n_cases):
+        # An existence rule holding in every case scores 1, and only a rule with both ratios 1 does
+        return AUTO_SELECTION_MULTIPLIER, AUTO_SELECTION_MULTIPLIER
+
+    # pm4py's rules table (1 = activated and satisfied, -1 = violated, 0 = not activated) over
+    # one trace per variant; the variants' case counts weight the rows
+    traces = Pm4pyEventLog([Trace([Event({"concept:name": a}) for a in profile.variant_sequences[v]])
+                            for v in occ.variants])
+    table = form_rules_table(traces)
+    values = table.to_numpy()
+    support = occ.weights @ (values != 0)
+    confidence = occ.weights @ (values == 1)
+    n_cases = occ.n_cases
+    scored = [(col, (float(supp) / float(n_cases)) * (float(conf) / float(supp)), i)
+              for i, (col, supp, conf) in enumerate(zip(table.columns, support, confidence)) if supp > 0]
+    _, _, best = sorted(scored, key=lambda x: (x[1], x[0]), reverse=True)[0]
+    return (float(support[best]) / float(n_cases) * AUTO_SELECTION_MULTIPLIER,
+            float(confidence[best]) / float(support[best]) * AUTO_SELECTION_MULTIPLIER)
+
+def discover_declare(
+    log: EventLog,
+    profile: LogProfile,
+    *,
+    case_mask: np.ndarray | None = None,
+    templates: tuple = DECLARE_TEMPLATES,
+    min_support_ratio: float | None = None,
+    min_confidence_ratio: float | None = None,
+) -> dict[str, dict]:
+    """
+    DECLARE rules of the requested templates over the cases in `case_mask`, in the shape of
+    pm4py.discover_declare: {template: {activity or (activity, activity): {"support", "confidence"}}}.
+    Without ratios, both are selected automatically as pm4py does (see _auto_ratios).
+    """
+    unknown = set(templates) - set(DECLARE_TEMPLATES)
+    if unknown:
+        raise ValueError(f"Unsupported DECLARE templates: {sorted(unknown)}")
+    occ = occurrence_matrix(log, profile, case_mask)
+    n_cases = occ.n_cases
+    if n_cases == 0:
+        return {}
+    labels = log.activity_labels
+    rules = _template_rules(occ, log.n_activities, tuple(templates))
+    if min_support_ratio is None and min_confidence_ratio is None:
+        min_support_ratio, min_confidence_ratio = _auto_ratios(occ, profile, log.n_activities)
+
+    model = {}
+    for template, (acts, support, confidence) in rules.items():
+        keep = (support >= n_cases * min_support_ratio) & (confidence >= support * min_confidence_ratio)
+        found = {}
+        for i in np.flatnonzero(keep):
+            key = labels[acts[0][i]] if len(acts) == 1 else (labels[acts[0][i]], labels[acts[1][i]])
+            found[key] = {"support": int(support[i]), "confidence": int(confidence[i])}
+        if found:
+            model[template] = found
+    return model
@@ -0,0 +1,99 @@
+# utils/directly_follows.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+
+from utils.event_log import EventLog
+
+# Directly-follows relation over the case index of an EventLog: every event that has a
+# successor in its case contributes the pair (its activity, next activity) and the time until
+# that successor. Both come from comparing the case-sorted arrays with themselves shifted by
+# one event; pairs are encoded as source * n_activities + target and counted in one pass.
+#
+# The relation is stored as sparse activity x activity matrices (CSR, rows = source activity)
+# sharing one sparsity pattern: frequency and total duration per pair. Footprints, process
+# statistics and the preview graph of the process page all read from it.
+
+@dataclass(frozen=True)
+class DirectlyFollows:
+    frequency: sparse.csr_matrix   # int64 number of occurrences, per (source, target) activity code
+    duration: sparse.csr_matrix    # float64 total seconds between the two events, same pattern
+    activity_labels: np.ndarray
+
+    @property
+    def n_pairs(self) -> int:
+        return int(self.frequency.nnz)
+
+    @property
+    def sources(self) -> np.ndarray:
+        """Source activity code, per stored pair (CSR order)."""
+        return np.repeat(np.arange(self.frequency.shape[0]), np.diff(self.frequency.indptr))
+
+    @property
+    def targets(self) -> np.ndarray:
+        """Target activity code, per stored pair (CSR order)."""
+        return self.frequency.indices
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of occurrences, per stored pair (CSR order)."""
+        return self.frequency.data
+
+    def mean_durations(self) -> np.ndarray:
+        """Mean seconds from source to target event, per stored pair (CSR order)."""
+        return self.duration.data / self.frequency.data
+
+    def outgoing(self) -> np.ndarray:
+        """Number of events of every activity code that have a successor in their case."""
+        return np.asarray(self.frequency.sum(axis=1)).ravel()
+
+    def to_dict(self, pairs: np.ndarray | None = None) -> dict[tuple[str, str], int]:
+        """(source label, target label) -> count, for all pairs or the given pair indices."""
+        idx = np.arange(self.n_pairs) if pairs is None else pairs
+        labels, sources, targets, counts = self.activity_labels, self.sources, self.targets, self.counts
+        return {(labels[sources[i]], labels[targets[i]]): int(counts[i]) for i in idx}
+
+    def top_paths(self, share: float, max_paths: int | None = None) -> np.ndarray:
+        """Indices of the most frequent pairs covering `share` of all occurrences (at most `max_paths`)."""
+        order = np.argsort(-self.counts, kind="stable")
+        covered = np.cumsum(self.counts[order]) / max(int(self.counts.sum()), 1)
+        n = min(int(np.searchsorted(covered, share, side="left")) + 1, len(order))
+        return order[:n if max_paths is None else min(n, max_paths)]
+
+    def footprints(self) -> dict[str, set]:
+        """
+        Footprint relations of the log (as pm4py.discover_footprints): `sequence` holds the pairs
+        a -> b whose reverse never occurs, `parallel` the pairs occurring in both directions.
+        """
+        follows = (self.frequency > 0).astype(np.int8)
+        both = follows.multiply(follows.T)
+        parallel, sequence = both.tocoo(), (follows - both).tocoo()
+        labels = self.activity_labels
+        return {
+            "sequence": {(labels[a], labels[b]) for a, b, v in zip(sequence.row, sequence.col, sequence.data) if v},
+            "parallel": {(labels[a], labels[b]) for a, b, v in zip(parallel.row, parallel.col, parallel.data) if v},
+        }
+
+def compute_directly_follows(log: EventLog, case_mask: np.ndarray | None = None) -> DirectlyFollows:
+    """Directly-follows counts and durations, optionally restricted to the cases in `case_mask`."""
+    has_next = log.cases.has_successor()
+    if case_mask is not None:
+        has_next &= log.cases.expand(case_mask)
+    position = np.flatnonzero(has_next)
+    n = log.n_activities
+    codes = log.activity_codes[position].astype(np.int64) * n + log.activity_codes[position + 1]
+    seconds = (log.timestamps[position + 1] - log.timestamps[position]) / 1e9
+
+    # np.unique sorts the codes, i.e. row-major (source, target) order, which is CSR order
+    pairs, inverse, counts = np.unique(codes, return_inverse=True, return_counts=True)
+    sources, targets = pairs // n, (pairs % n).astype(np.int32)
+    indptr = np.searchsorted(sources, np.arange(n + 1), side="left")
+    total_seconds = np.bincount(inverse, weights=seconds, minlength=len(pairs))
+    return DirectlyFollows(
+        frequency=sparse.csr_matrix((counts.astype(np.int64), targets, indptr), shape=(n, n)),
+        duration=sparse.csr_matrix((total_seconds, targets, indptr), shape=(n, n)),
+        activity_labels=log.activity_labels,
+    )
@@ -0,0 +1,84 @@
+# utils/dotted_chart.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.event_log import EventLog
+from utils.temporal import wall_clock_ns
+
+# Rasterized dotted chart: instead of one marker per event, events are binned by (time, case)
+# into a fixed grid of counts and drawn as an image. Cases are ordered by the time of their
+# first event, as in the classic dotted chart. Binning is one np.bincount over the flattened
+# cell index, so the cost grows linearly with the events and the grid size is fixed.
+# A time window re-bins only the events inside it (zoom) at full grid resolution.
+
+DEFAULT_TIME_BINS = 600
+DEFAULT_CASE_BINS = 300
+
+@dataclass(frozen=True)
+class DottedChartGrid:
+    counts: np.ndarray   # int64 events, shape (case bins, time bins); row 0 = earliest cases
+    start: int           # wall-clock ns at the left edge
+    end: int             # wall-clock ns at the right edge
+    first_case: int      # start-order rank of the first case covered (0-based)
+    last_case: int       # start-order rank of the last case covered
+    n_events: int        # events inside the window
+    n_cases: int         # cases with events inside the window (<= last_case - first_case + 1)
+
+    @property
+    def time_bin_ns(self) -> float:
+        """Width of a time bin in ns, as used for binning the events."""
+        return _time_bin_ns(self.start, self.end, self.counts.shape[1])
+
+    def time_bin_start(self, col: int) -> int:
+        """Wall-clock ns at the left edge of time bin `col`."""
+        return int(self.start + col * self.time_bin_ns)
+
+def _time_bin_ns(start: int, end: int, time_bins: int) -> float:
+    # Inclusive range, so that an event at `end` falls into the last bin
+    return (end - start + 1) / time_bins
+
+def case_start_ranks(log: EventLog) -> np.ndarray:
+    """Rank of every case code when cases are ordered by their first event (ties by code)."""
+    first_ts = log.timestamps[log.cases.starts]  # events are sorted by timestamp within a case
+    rank = np.empty(log.n_cases, dtype=np.int64)
+    rank[np.argsort(first_ts, kind="stable")] = np.arange(log.n_cases)
+    return rank
+
+def dotted_chart_grid(
+    log: EventLog,
+    window: tuple[int, int] | None = None,
+    *,
+    time_bins: int = DEFAULT_TIME_BINS,
+    case_bins: int = DEFAULT_CASE_BINS,
+) -> DottedChartGrid | None:
+    """
+    Event counts per (case, time) cell. `window` = (start, end) in wall-clock ns restricts the
+    chart to the events in that time range and to the cases having events in it.
+    None if no event falls into the window.
+    """
+    if log.n_events == 0:
+        return None
+    wall = wall_clock_ns(log)
+    event_rank = log.cases.expand(case_start_ranks(log))
+    if window is not None:
+        inside = (wall >= window[0]) & (wall <= window[1])
+        wall, event_rank = wall[inside], event_rank[inside]
+        if not len(wall):
+            return None
+        start, end = int(window[0]), int(window[1])
+    else:
+        start, end = int(wall.min()), int(wall.max())
+
+    first_case, last_case = int(event_rank.min()), int(event_rank.max())
+    has_events = np.zeros(last_case - first_case + 1, dtype=bool)
+    has_events[event_rank - first_case] = True
+    case_bins = min(case_bins, last_case - first_case + 1)
+    # Float scaling ((wall - start) * time_bins could overflow int64); rounding may hit time_bins
+    col = np.minimum(((wall - start) / _time_bin_ns(start, end, time_bins)).astype(np.int64), time_bins - 1)
+    row = (event_rank - first_case) * case_bins // (last_case - first_case + 1)
+    counts = np.bincount(row * time_bins + col, minlength=case_bins * time_bins).reshape(case_bins, time_bins)
+    return DottedChartGrid(counts=counts, start=start, end=end, first_case=first_case,
+                           last_case=last_case, n_events=int(len(wall)), n_cases=int(has_events.sum()))
@@ -0,0 +1,189 @@
+# utils/event_log.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Compact, dictionary-encoded view of the formatted event log. It is built once at upload:
+# case, activity and resource labels become int32 codes into small lookup tables and
+# timestamps become int64 nanoseconds since the epoch (UTC), so analytics can count and
+# group with NumPy instead of hashing strings on every rerun.
+#
+# Events are stored sorted by (case, timestamp) and case codes follow that order, so the
+# events of case c are the contiguous range offsets[c]:offsets[c + 1] (CSR layout).
+
+@dataclass(frozen=True)
+class CaseIndex:
+    """CSR index over the case-sorted events: per-case slices are zero-copy views."""
+    offsets: np.ndarray                    # int64, n_cases + 1 entries
+
+    @property
+    def n_cases(self) -> int:
+        return int(len(self.offsets) - 1)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.offsets[:-1]
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self.offsets[1:]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def slice(self, case_code: int) -> slice:
+        return slice(int(self.offsets[case_code]), int(self.offsets[case_code + 1]))
+
+    def view(self, values: np.ndarray, case_code: int) -> np.ndarray:
+        """Events of one case as a view into `values` (an event-aligned array)."""
+        return values[self.slice(case_code)]
+
+    def first(self, values: np.ndarray) -> np.ndarray:
+        """Value of the first event of every case."""
+        return values[self.starts]
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        """Value of the last event of every case."""
+        return values[self.ends - 1]
+
+    def reduce(self, ufunc: np.ufunc, values: np.ndarray) -> np.ndarray:
+        """Per-case reduction of an event-aligned array (e.g. np.minimum, np.add) in one pass."""
+        if self.n_cases == 0:
+            return np.zeros(0, dtype=values.dtype)
+        return ufunc.reduceat(values, self.starts)
+
+    def position_in_case(self) -> np.ndarray:
+        """0-based position of every event within its case."""
+        n_events = int(self.offsets[-1])
+        return np.arange(n_events, dtype=np.int64) - np.repeat(self.starts, self.lengths)
+
+    def has_successor(self) -> np.ndarray:
+        """Boolean event mask: True where the next event belongs to the same case."""
+        n_events = int(self.offsets[-1])
+        mask = np.ones(n_events, dtype=bool)
+        mask[self.ends[self.lengths > 0] - 1] = False
+        return mask
+
+    def expand(self, case_values: np.ndarray) -> np.ndarray:
+        """Broadcast a per-case array (e.g. a case mask) to all events."""
+        return np.repeat(case_values, self.lengths)
+
+@dataclass(frozen=True)
+class EventLog:
+    case_codes: np.ndarray                 # int32, one per event
+    activity_codes: np.ndarray             # int32, one per event
+    resource_codes: np.ndarray | None      # int32, one per event (None if the log has no resources)
+    timestamps: np.ndarray                 # int64 ns since epoch (UTC), one per event
+    case_labels: np.ndarray                # object, code -> case id
+    activity_labels: np.ndarray            # object, code -> activity
+    resource_labels: np.ndarray | None     # object, code -> resource
+    cases: CaseIndex                       # CSR offsets of the case-sorted events
+    tz: str | None = None                  # timezone of the source timestamps
+    frame_order: np.ndarray | None = None  # event -> row of the source frame (None: same order)
+
+    @property
+    def n_events(self) -> int:
+        return int(len(self.activity_codes))
+
+    @property
+    def n_cases(self) -> int:
+        return int(len(self.case_labels))
+
+    @property
+    def n_activities(self) -> int:
+        return int(len(self.activity_labels))
+
+    @property
+    def n_resources(self) -> int:
+        return int(len(self.resource_labels)) if self.resource_labels is not None else 0
+
+    def activity_counts(self) -> np.ndarray:
+        """Number of events per activity code."""
+        return np.bincount(self.activity_codes, minlength=self.n_activities)
+
+    def resource_counts(self) -> np.ndarray:
+        """Number of events per resource code (empty if the log has no resources)."""
+        if self.resource_codes is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.bincount(self.resource_codes, minlength=self.n_resources)
+
+    def to_frame_mask(self, event_mask: np.ndarray) -> np.ndarray:
+        """Map a boolean mask over the log's events to the row order of the source frame."""
+        if self.frame_order is None:
+            return event_mask
+        out = np.empty_like(event_mask)
+        out[self.frame_order] = event_mask
+        return out
+
+    def to_datetime(self, values) -> pd.DatetimeIndex:
+        """Convert int64 epoch nanoseconds back to timestamps in the log's timezone."""
+        index = pd.to_datetime(np.asarray(values, dtype=np.int64), unit="ns", utc=True)
+        return index.tz_convert(self.tz) if self.tz else index.tz_localize(None)
+
+def _encode(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode a column; missing values get their own label instead of -1."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes.astype(np.int32, copy=False), np.asarray(uniques, dtype=object)
+
+def _epoch_ns(values: pd.Series) -> tuple[np.ndarray, str | None]:
+    values = pd.to_datetime(values)
+    tz = str(values.dt.tz) if values.dt.tz is not None else None
+    if tz is None:
+        values = values.dt.tz_localize("UTC")
+    return values.dt.as_unit("ns").astype(np.int64).to_numpy(), tz
+
+def build_event_log(
+    df: pd.DataFrame,
+    *,
+    case_id_key: str,
+    activity_key: str,
+    timestamp_key: str,
+    resource_key: str | None = None,
+) -> EventLog:
+    """
+    Encode an event log and index it by case.
+    A frame formatted by pm4py.format_dataframe is already sorted by case and timestamp and is
+    encoded as is; any other order is sorted here (stable) and remembered in `frame_order`.
+    """
+    case_codes, case_labels = _encode(df[case_id_key])
+    activity_codes, activity_labels = _encode(df[activity_key])
+    if resource_key and resource_key in df.columns:
+        resource_codes, resource_labels = _encode(df[resource_key])
+    else:
+        resource_codes, resource_labels = None, None
+    timestamps, tz = _epoch_ns(df[timestamp_key])
+
+    frame_order = None
+    if not _is_case_sorted(case_codes, timestamps):
+        frame_order = np.lexsort((timestamps, case_codes))
+        case_codes, activity_codes, timestamps = case_codes[frame_order], activity_codes[frame_order], timestamps[frame_order]
+        if resource_codes is not None:
+            resource_codes = resource_codes[frame_order]
+    offsets = np.searchsorted(case_codes, np.arange(len(case_labels) + 1), side="left").astype(np.int64)
+
+    return EventLog(
+        case_codes=case_codes,
+        activity_codes=activity_codes,
+        resource_codes=resource_codes,
+        timestamps=timestamps,
+        case_labels=case_labels,
+        activity_labels=activity_labels,
+        resource_labels=resource_labels,
+        cases=CaseIndex(offsets),
+        tz=tz,
+        frame_order=frame_order,
+    )
+
+def _is_case_sorted(case_codes: np.ndarray, timestamps: np.ndarray) -> bool:
+    """True if case codes never decrease and timestamps never decrease within a case."""
+    if len(case_codes) < 2:
+        return True
+    case_step = np.diff(case_codes)
+    if (case_step < 0).any():
+        return False
+    same_case = case_step == 0
+    return not (np.diff(timestamps)[same_case] < 0).any()
@@ -0,0 +1,73 @@
+# utils/frequencies.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Frequency tables over dictionary-encoded columns. The counts per code are computed once
+# (see LogProfile); top-K, relative shares and the summary of the values beyond the top-K are
+# all served from that array. Top-K uses partial selection (np.partition, O(n)) and sorts only
+# the selected codes, so columns with hundreds of thousands of distinct values stay cheap.
+
+@dataclass(frozen=True)
+class TailSummary:
+    n_values: int   # distinct values beyond the top-K
+    count: int      # their total count
+    share: float    # their share of the total, in percent
+    head: list      # (label, count) of the largest of them, descending
+
+@dataclass(frozen=True)
+class FrequencyTable:
+    labels: np.ndarray   # object, code -> label
+    counts: np.ndarray   # int64 count, per code
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def n_values(self) -> int:
+        """Number of distinct values that occur at least once."""
+        return int(np.count_nonzero(self.counts))
+
+    def top(self, k: int) -> np.ndarray:
+        """
+        Codes of the k most frequent values, by count descending and code ascending on ties
+        (the order of a stable argsort), without sorting the whole table.
+        """
+        counts = self.counts
+        k = min(k, self.n_values)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        if k < len(counts):
+            kth = np.partition(counts, len(counts) - k)[len(counts) - k]
+            above = np.flatnonzero(counts > kth)
+            ties = np.flatnonzero(counts == kth)[:k - len(above)]
+            codes = np.concatenate([above, ties])
+        else:
+            codes = np.arange(len(counts))
+        return codes[np.lexsort((codes, -counts[codes]))]
+
+    def shares(self, codes: np.ndarray | None = None) -> np.ndarray:
+        """Share of the total in percent, per code (or for the given codes)."""
+        counts = self.counts if codes is None else self.counts[codes]
+        return counts * (100.0 / max(self.total, 1))
+
+    def items(self, codes: np.ndarray) -> list[tuple]:
+        """(label, count) pairs for the given codes."""
+        return [(self.labels[c], int(self.counts[c])) for c in codes]
+
+    def tail(self, k: int, head: int = 10) -> TailSummary:
+        """Values beyond the top k: how many, their total count and share, and the largest `head` of them."""
+        n_hidden = max(self.n_values - k, 0)
+        if n_hidden == 0:
+            return TailSummary(n_values=0, count=0, share=0.0, head=[])
+        top = self.top(k + head)
+        hidden_count = self.total - int(self.counts[top[:k]].sum())
+        return TailSummary(
+            n_values=n_hidden,
+            count=hidden_count,
+            share=hidden_count * 100.0 / max(self.total, 1),
+            head=self.items(top[k:]),
+        )
@@ -0,0 +1,313 @@
+# utils/ingest.py
+from __future__ import annotations
+
+import gzip
+import os
+import zipfile
+from io import BytesIO
+from typing import Callable, Iterator
+
+import pandas as pd
+from lxml import etree
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+
+# Streaming readers for uploaded event logs. They consume the upload stream directly
+# (no temp files, no second in-memory copy) and report progress from the bytes consumed.
+
+XES_BATCH_EVENTS = 50_000
+CSV_CHUNK_ROWS = 500_000
+CSV_SAMPLE_BYTES = 1024 * 1024
+
+# Column names pm4py expects; uploaded logs are renamed to these before formatting
+STANDARD_KEYS = {
+    "case_id_key": "case:concept:name",
+    "activity_key": "concept:name",
+    "timestamp_key": "time:timestamp",
+    "resource_key": "org:resource",
+}
+
+# XES attribute tags and how their `value` is converted while parsing; dates are kept as
+# strings and parsed per batch in one vectorized call.
+_XES_VALUE_PARSERS = {
+    "string": str,
+    "id": str,
+    "int": int,
+    "float": float,
+    "boolean": lambda v: v.strip().lower() == "true",
+    "date": str,
+}
+
+class _ProgressReader:
+    """
+    File-like wrapper that reports the fraction of the stream read so far.
+    Seekable streams (e.g. zip members) report their position, others the bytes consumed.
+    """
+
+    def __init__(self, stream, total_bytes: int | None, progress: Callable[[float], None] | None):
+        self._stream = stream
+        self._total = total_bytes or 0
+        self._progress = progress
+        self._consumed = 0
+        self._last_pct = -1
+        self._seekable = bool(getattr(stream, "seekable", lambda: False)())
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._stream.read(size)
+        self._consumed += len(chunk)
+        if self._progress is not None and self._total:
+            position = self._stream.tell() if self._seekable else self._consumed
+            pct = min(100, int(position * 100 / self._total))
+            if pct != self._last_pct:  # avoid flooding the UI with identical updates
+                self._last_pct = pct
+                self._progress(pct / 100)
+        return chunk
+
+    def __getattr__(self, name):
+        # seek/tell/seekable etc. are served by the wrapped stream
+        return getattr(self._stream, name)
+
+class _PrefixedReader:
+    """File-like reader that replays an already consumed prefix before the rest of the stream."""
+
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if self._prefix:
+            if size is None or size < 0:
+                out, self._prefix = self._prefix + self._stream.read(), b""
+                return out
+            out, self._prefix = self._prefix[:size], self._prefix[size:]
+            if len(out) < size:
+                out += self._stream.read(size - len(out))
+            return out
+        return self._stream.read(size)
+
+def _local(tag) -> str:
+    """Strip the XES namespace from a tag."""
+    return etree.QName(tag).localname if isinstance(tag, str) else ""
+
+def _read_attributes(elem) -> dict:
+    """Collect the direct (non-nested) XES attributes of a trace or event element."""
+    attrs = {}
+    for child in elem:
+        parser = _XES_VALUE_PARSERS.get(_local(child.tag))
+        if parser is None:
+            continue
+        key, value = child.get("key"), child.get("value")
+        if key is None or value is None:
+            continue
+        try:
+            attrs[key] = parser(value)
+        except ValueError:
+            attrs[key] = value
+    return attrs
+
+def _collect_date_keys(elem, date_keys: set, prefix: str = "") -> None:
+    for child in elem:
+        if _local(child.tag) == "date" and child.get("key"):
+            date_keys.add(prefix + child.get("key"))
+
+def _batch_frame(columns: dict, date_keys: set) -> pd.DataFrame:
+    batch = pd.DataFrame(columns)
+    for key in date_keys.intersection(batch.columns):
+        batch[key] = pd.to_datetime(batch[key], utc=True, format="ISO8601")
+    return batch
+
+def iter_xes_batches(
+    stream,
+    *,
+    total_bytes: int | None = None,
+    progress: Callable[[float], None] | None = None,
+    batch_size: int = XES_BATCH_EVENTS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Incrementally parse an XES stream with lxml.iterparse and yield columnar event batches.
+    Trace attributes are prefixed with "case:" (as in pm4py's DataFrame conversion); parsed
+    elements are cleared as soon as they are consumed, so memory stays bounded by the batch.
+    """
+    reader = _ProgressReader(stream, total_bytes, progress)
+    columns: dict[str, list] = {}
+    n_rows = 0
+    date_keys: set = set()
+    trace_events: list[dict] = []
+
+    def _append(row: dict):
+        nonlocal n_rows
+        for key, col in columns.items():
+            col.append(row.get(key))
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = [None] * n_rows + [value]
+        n_rows += 1
+
+    context = etree.iterparse(reader, events=("end",), huge_tree=True, remove_comments=True)
+    for _, elem in context:
+        tag = _local(elem.tag)
+        if tag == "event":
+            _collect_date_keys(elem, date_keys)
+            trace_events.append(_read_attributes(elem))
+            elem.clear(keep_tail=False)
+        elif tag == "trace":
+            _collect_date_keys(elem, date_keys, prefix="case:")
+            case_attrs = {f"case:{k}": v for k, v in _read_attributes(elem).items()}
+            for event in trace_events:
+                event.update(case_attrs)
+                _append(event)
+            trace_events = []
+            # Free the trace and every already processed sibling
+            elem.clear(keep_tail=False)
+            parent = elem.getparent()
+            while elem.getprevious() is not None:
+                del parent[0]
+            if n_rows >= batch_size:
+                yield _batch_frame(columns, date_keys)
+                columns, n_rows = {}, 0
+    if n_rows:
+        yield _batch_frame(columns, date_keys)
+
+def read_xes_stream(
+    stream,
+    *,
+    total_bytes: int | None = None,
+    progress: Callable[[float], None] | None = None,
+    batch_size: int = XES_BATCH_EVENTS,
+) -> pd.DataFrame:
+    """Read an XES stream into a pandas DataFrame (one row per event)."""
+    batches = list(iter_xes_batches(stream, total_bytes=total_bytes, progress=progress, batch_size=batch_size))
+    if not batches:
+        raise ValueError("The XES file does not contain any events.")
+    df = pd.concat(batches, ignore_index=True, copy=False)
+    del batches
+    return df
+
+# ---------- Compressed uploads ----------
+
+LOG_SUFFIXES = (".csv", ".xes")
+ARCHIVE_SUFFIXES = (".gz", ".zip", ".zst")
+
+def _zstd_reader(stream):
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("Reading .zst files requires the 'zstandard' package (pip install zstandard).") from e
+    return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+
+def open_upload(
+    stream,
+    file_name: str,
+    *,
+    total_bytes: int | None = None,
+    progress: Callable[[float], None] | None = None,
+):
+    """
+    Return (readable stream, log suffix) for an upload, decompressing .gz/.zip/.zst archives on
+    the fly. Only small decompression buffers are held in memory, never the whole decompressed log.
+    Progress is reported on the (compressed) upload bytes; for .zip archives, whose central
+    directory at the end is read first, on the bytes of the log member.
+    """
+    name = file_name.lower()
+    raw = _ProgressReader(stream, total_bytes, progress)
+    base, suffix = os.path.splitext(name)
+
+    if suffix in LOG_SUFFIXES:
+        return raw, suffix
+    if suffix == ".gz":
+        return gzip.GzipFile(fileobj=raw, mode="rb"), os.path.splitext(base)[1]
+    if suffix == ".zst":
+        return _zstd_reader(raw), os.path.splitext(base)[1]
+    if suffix == ".zip":
+        archive = zipfile.ZipFile(stream)
+        members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith(LOG_SUFFIXES)]
+        if len(members) != 1:
+            raise ValueError("The zip archive must contain exactly one .csv or .xes file.")
+        member = members[0]
+        return _ProgressReader(archive.open(member), member.file_size, progress), os.path.splitext(member.filename.lower())[1]
+    raise ValueError(f"Unsupported file type: {file_name}")
+
+# ---------- CSV ----------
+
+def infer_timestamp_format(values: pd.Series) -> str:
+    """
+    Guess a strftime format from a sample of timestamp strings and check it against the sample.
+    Falls back to "ISO8601" or "mixed" when no single explicit format fits.
+    """
+    sample = values.dropna().astype(str)
+    if sample.empty:
+        return "mixed"
+    fmt = guess_datetime_format(sample.iloc[0])
+    for candidate in (fmt, "ISO8601"):
+        if candidate is None:
+            continue
+        try:
+            pd.to_datetime(sample, format=candidate, utc=True)
+            return candidate
+        except (ValueError, TypeError):
+            continue
+    return "mixed"
+
+def _parse_timestamps(values: pd.Series, fmt: str) -> pd.Series:
+    try:
+        return pd.to_datetime(values, format=fmt, utc=True)
+    except (ValueError, TypeError):
+        # A chunk deviating from the sampled format: parse it element-wise
+        return pd.to_datetime(values, format="mixed", utc=True)
+
+def read_csv_chunked(
+    stream,
+    *,
+    case_id_key: str,
+    activity_key: str,
+    timestamp_key: str,
+    resource_key: str | None = None,
+    total_bytes: int | None = None,
+    progress: Callable[[float], None] | None = None,
+    chunksize: int = CSV_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Read a CSV event log in chunks.
+    - The timestamp format is inferred once from a sampled prefix and then applied explicitly.
+    - Case, activity and resource columns are loaded as pandas categoricals.
+    """
+    prefix = stream.read(CSV_SAMPLE_BYTES)
+    sample = prefix[: prefix.rfind(b"\n") + 1] or prefix  # complete lines only
+    sample_rows = pd.read_csv(BytesIO(sample), usecols=lambda c: c == timestamp_key, dtype=str) if sample else pd.DataFrame()
+    if timestamp_key not in sample_rows.columns:
+        raise ValueError(f"{timestamp_key} column (timestamp) is not in the CSV file!")
+    ts_format = infer_timestamp_format(sample_rows[timestamp_key])
+
+    categorical_keys = [k for k in (case_id_key, activity_key, resource_key) if k]
+    reader = _ProgressReader(_PrefixedReader(prefix, stream), total_bytes, progress)
+    dtypes = {k: "category" for k in categorical_keys}
+    dtypes[timestamp_key] = str
+
+    chunks = []
+    for chunk in pd.read_csv(reader, chunksize=chunksize, dtype=dtypes):
+        chunk[timestamp_key] = _parse_timestamps(chunk[timestamp_key], ts_format)
+        chunks.append(chunk)
+    if not chunks:
+        raise ValueError("The CSV file does not contain any events.")
+
+    # Chunks carry their own categories; unify them instead of letting concat fall back to object
+    categorical_keys = [k for k in categorical_keys if k in chunks[0].columns]
+    unified = {k: union_categoricals([c[k] for c in chunks], ignore_order=True) for k in categorical_keys}
+    df = pd.concat([c.drop(columns=categorical_keys) for c in chunks], ignore_index=True, copy=False)
+    del chunks
+    for key, values in unified.items():
+        df[key] = values
+    return df
+
+def to_standard_columns(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
+    """
+    Rename the mapped key columns to the names pm4py expects (see STANDARD_KEYS), so that
+    pm4py.format_dataframe does not add a second copy of each of them.
+    """
+    renames = {
+        mapping[state_key]: standard
+        for state_key, standard in STANDARD_KEYS.items()
+        if mapping.get(state_key) in df.columns and mapping[state_key] != standard
+    }
+    clashing = [standard for standard in renames.values() if standard in df.columns]
+    return df.drop(columns=clashing).rename(columns=renames, copy=False)
@@ -13,9 +13,8 @@ from utils.state import (
     init_session_state,
     set_viz_meta,
     feedback_input,
-    attach_text_to_visual,
 )
-from utils.media import register_matplotlib_figure
+from utils.media import figure_to_png, register_png_bytes
 
 
 init_session_state()  # ensure session keys exist
@@ -285,12 +284,11 @@ def run_generated_visualization(
     title = meta.get("title") or suggestion
     key = meta.get("key") or _slugify(title)
 
-    # --- show in UI ---
+    # --- rasterize once: show in UI and register the same bytes for PDF ---
     import matplotlib.pyplot as plt
-    st.pyplot(fig)
-
-    # --- register image bytes for PDF ---
-    register_matplotlib_figure(fig, key=key, title=title)
+    png = figure_to_png(fig)
+    st.image(png, use_container_width=True)
+    register_png_bytes(png, key=key, title=title)
 
     # --- store metadata for later LLM context ---
     meta_out = dict(meta)  # shallow copy
@@ -301,8 +299,7 @@ def run_generated_visualization(
     # --- feedback directly under the figure ---
     fb_key = f"feedback__{key}"
     fb_label = "Feedback"
-    feedback_input(fb_label, fb_key)
-    attach_text_to_visual(key, fb_label, kind="feedback", from_input_key=fb_key)
+    feedback_input(fb_label, fb_key, viz_key=key)
 
     # small clean-up
     plt.close(fig)
@@ -0,0 +1,140 @@
+# utils/log_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Parsed event logs are cached on disk as Parquet, keyed by a hash of the uploaded bytes
+# plus the column mapping. Every entry has a small JSON sidecar for listing purposes;
+# the Parquet file's mtime acts as the LRU clock.
+
+# Bump whenever the layout of the cached DataFrames changes, so stale entries are not reused
+CACHE_LAYOUT_VERSION = 2
+
+DEFAULT_CACHE_DIR = ".aid4de_cache"
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3   # 10 GB
+_HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+def _cache_dir() -> Path:
+    """Directory holding the cached logs (AID4DE_CACHE_DIR, created on demand)."""
+    path = Path(os.getenv("AID4DE_CACHE_DIR", DEFAULT_CACHE_DIR)) / "logs"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _cache_budget() -> int:
+    """Size budget in bytes (AID4DE_CACHE_MAX_BYTES)."""
+    try:
+        return int(os.getenv("AID4DE_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_CACHE_MAX_BYTES
+
+def _paths(key: str) -> tuple[Path, Path]:
+    base = _cache_dir()
+    return base / f"{key}.parquet", base / f"{key}.json"
+
+def content_key(stream, mapping: dict) -> str:
+    """
+    Hash the uploaded bytes together with the column mapping.
+    The stream is read in chunks and rewound afterwards, so it can be parsed right away.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps({"layout": CACHE_LAYOUT_VERSION, **mapping}, sort_keys=True).encode("utf-8"))
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(_HASH_CHUNK_BYTES), b""):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
+
+def load_cached_log(key: str) -> pd.DataFrame | None:
+    """Return the cached DataFrame for `key` (and mark it as recently used) or None."""
+    data_path, _ = _paths(key)
+    if not data_path.exists():
+        return None
+    try:
+        df = pd.read_parquet(data_path)
+    except Exception:
+        # Corrupt or half-written entry: drop it and fall back to parsing
+        purge_cached_logs([key])
+        return None
+    os.utime(data_path, None)
+    return df
+
+def store_cached_log(key: str, df: pd.DataFrame, *, file_name: str, mapping: dict) -> bool:
+    """
+    Persist a formatted event log under `key` and enforce the size budget.
+    Returns False if the frame cannot be serialized (e.g. mixed-type attribute columns).
+    """
+    data_path, meta_path = _paths(key)
+    tmp_path = data_path.with_suffix(".parquet.tmp")
+    try:
+        df.to_parquet(tmp_path, index=False)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        return False
+    os.replace(tmp_path, data_path)
+
+    meta = {
+        "key": key,
+        "file_name": file_name,
+        "mapping": mapping,
+        "rows": int(len(df)),
+        "created": time.time(),
+    }
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    evict_to_budget(keep=key)
+    return True
+
+def list_cached_logs() -> list[dict]:
+    """List cache entries, most recently used first."""
+    entries = []
+    for data_path in _cache_dir().glob("*.parquet"):
+        key = data_path.stem
+        meta_path = data_path.with_suffix(".json")
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            meta = {"key": key}
+        stat = data_path.stat()
+        entries.append({
+            "key": key,
+            "file_name": meta.get("file_name", "?"),
+            "rows": meta.get("rows"),
+            "size_bytes": stat.st_size,
+            "last_used": stat.st_mtime,
+        })
+    entries.sort(key=lambda e: e["last_used"], reverse=True)
+    return entries
+
+def purge_cached_logs(keys: list[str] | None = None) -> int:
+    """Delete the given entries (all entries if `keys` is None). Returns the number removed."""
+    if keys is None:
+        keys = [e["key"] for e in list_cached_logs()]
+    removed = 0
+    for key in keys:
+        data_path, meta_path = _paths(key)
+        if data_path.exists():
+            data_path.unlink(missing_ok=True)
+            removed += 1
+        meta_path.unlink(missing_ok=True)
+    return removed
+
+def evict_to_budget(keep: str | None = None) -> list[str]:
+    """Evict least recently used entries until the cache fits its size budget."""
+    budget = _cache_budget()
+    entries = list_cached_logs()
+    total = sum(e["size_bytes"] for e in entries)
+    evicted = []
+    for entry in reversed(entries):  # least recently used first
+        if total <= budget:
+            break
+        if entry["key"] == keep:
+            continue
+        purge_cached_logs([entry["key"]])
+        total -= entry["size_bytes"]
+        evicted.append(entry["key"])
+    return evicted
@@ -0,0 +1,151 @@
+# utils/log_profile.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.event_log import EventLog
+from utils.frequencies import FrequencyTable
+from utils.variants import compute_variants
+
+# Per-dataset profile computed once in a single pass over the case-sorted EventLog.
+# Every page (and the chatbot context) reads variants, case lengths, start/end activities,
+# case time spans and activity/resource counts from here instead of re-scanning the log.
+
+@dataclass(frozen=True)
+class LogProfile:
+    fingerprint: str
+    case_lengths: np.ndarray         # int64, per case code
+    case_start_activity: np.ndarray  # int32 activity code, per case code
+    case_end_activity: np.ndarray    # int32 activity code, per case code
+    case_first_ts: np.ndarray        # int64 epoch ns, per case code
+    case_last_ts: np.ndarray         # int64 epoch ns, per case code
+    case_variant: np.ndarray         # int64 variant index, per case code
+    variant_sequences: list          # variant index -> tuple of activity labels
+    variant_counts: np.ndarray       # int64 number of cases, per variant index
+    coverage_curve: np.ndarray       # float64 share of cases covered by the k+1 most frequent variants
+    case_rank: np.ndarray            # int64 frequency rank of the case's variant, per case code
+    frame_rank: np.ndarray           # int64 frequency rank of the event's variant, per row of the formatted frame
+    activity_counts: np.ndarray      # int64 events, per activity code
+    resource_counts: np.ndarray      # int64 events, per resource code
+    activity_labels: np.ndarray
+    resource_labels: np.ndarray | None
+
+    @property
+    def n_cases(self) -> int:
+        return int(len(self.case_lengths))
+
+    @property
+    def n_variants(self) -> int:
+        return int(len(self.variant_counts))
+
+    def variants(self) -> dict[tuple, int]:
+        """Variant -> number of cases (same shape as pm4py.get_variants)."""
+        return {seq: int(cnt) for seq, cnt in zip(self.variant_sequences, self.variant_counts)}
+
+    def stochastic_language(self) -> dict[tuple, float]:
+        """Variant -> share of cases (same shape as pm4py.get_stochastic_language)."""
+        total = max(self.n_cases, 1)
+        return {seq: cnt / total for seq, cnt in zip(self.variant_sequences, self.variant_counts.tolist())}
+
+    def variants_for_coverage(self, threshold: float) -> int:
+        """Number of most frequent variants needed to cover `threshold` of the cases."""
+        if self.n_variants == 0:
+            return 0
+        return min(int(np.searchsorted(self.coverage_curve, threshold, side="left")) + 1, self.n_variants)
+
+    def activity_frequencies(self) -> FrequencyTable:
+        """Events per activity as a frequency table (top-K, shares, tail)."""
+        return FrequencyTable(labels=self.activity_labels, counts=self.activity_counts)
+
+    def resource_frequencies(self) -> FrequencyTable | None:
+        """Events per resource as a frequency table; None if the log has no resources."""
+        if self.resource_labels is None:
+            return None
+        return FrequencyTable(labels=self.resource_labels, counts=self.resource_counts)
+
+    def start_activities(self, case_mask: np.ndarray | None = None) -> dict[str, int]:
+        """Start activity -> number of cases, optionally restricted to the cases in `case_mask`."""
+        return self._activity_histogram(self.case_start_activity, case_mask)
+
+    def end_activities(self, case_mask: np.ndarray | None = None) -> dict[str, int]:
+        """End activity -> number of cases, optionally restricted to the cases in `case_mask`."""
+        return self._activity_histogram(self.case_end_activity, case_mask)
+
+    def _activity_histogram(self, codes: np.ndarray, case_mask: np.ndarray | None) -> dict[str, int]:
+        if case_mask is not None:
+            codes = codes[case_mask]
+        counts = np.bincount(codes, minlength=len(self.activity_labels))
+        return {self.activity_labels[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def summary(self, top_n: int = 5) -> dict:
+        """Compact, JSON-friendly description of the log (e.g. for the chatbot context)."""
+        top_variants = np.argsort(-self.variant_counts, kind="stable")[:top_n]
+        top_acts = self.activity_frequencies().top(top_n)
+        starts = sorted(self.start_activities().items(), key=lambda x: x[1], reverse=True)[:top_n]
+        ends = sorted(self.end_activities().items(), key=lambda x: x[1], reverse=True)[:top_n]
+        lengths = self.case_lengths
+        return {
+            "events": int(lengths.sum()),
+            "cases": self.n_cases,
+            "variants": self.n_variants,
+            "activities": int(len(self.activity_labels)),
+            "resources": int(len(self.resource_labels)) if self.resource_labels is not None else 0,
+            "case_length": {
+                "min": int(lengths.min()) if len(lengths) else 0,
+                "mean": round(float(lengths.mean()), 2) if len(lengths) else 0.0,
+                "max": int(lengths.max()) if len(lengths) else 0,
+            },
+            "top_variants": [
+                {"activities": list(self.variant_sequences[i]), "cases": int(self.variant_counts[i])}
+                for i in top_variants
+            ],
+            "top_activities": {self.activity_labels[i]: int(self.activity_counts[i]) for i in top_acts},
+            "top_start_activities": dict(starts),
+            "top_end_activities": dict(ends),
+        }
+
+def build_log_profile(log: EventLog, *, fingerprint: str) -> LogProfile:
+    """
+    Profile the log in one pass over its case index (see EventLog.cases): every per-case
+    array is indexed by case code.
+    """
+    cases = log.cases
+
+    # Per-case facts straight from the CSR offsets
+    case_lengths = cases.lengths
+    case_start_activity = cases.first(log.activity_codes)
+    case_end_activity = cases.last(log.activity_codes)
+    case_first_ts = cases.first(log.timestamps)
+    case_last_ts = cases.last(log.timestamps)
+
+    variants = compute_variants(log)
+
+    # Coverage curve: variants by descending frequency (ties in first-occurrence order)
+    by_frequency = np.argsort(-variants.counts, kind="stable")
+    variant_rank = np.empty(len(by_frequency), dtype=np.int64)
+    variant_rank[by_frequency] = np.arange(len(by_frequency))
+    coverage_curve = np.cumsum(variants.counts[by_frequency]) / max(cases.n_cases, 1)
+    case_rank = variant_rank[variants.case_variant]
+    frame_rank = np.empty(log.n_events, dtype=np.int64)
+    frame_rank[log.frame_order if log.frame_order is not None else slice(None)] = cases.expand(case_rank)
+
+    return LogProfile(
+        fingerprint=fingerprint,
+        case_lengths=case_lengths,
+        case_start_activity=case_start_activity,
+        case_end_activity=case_end_activity,
+        case_first_ts=case_first_ts,
+        case_last_ts=case_last_ts,
+        case_variant=variants.case_variant,
+        variant_sequences=variants.sequences,
+        variant_counts=variants.counts,
+        coverage_curve=coverage_curve,
+        case_rank=case_rank,
+        frame_rank=frame_rank,
+        activity_counts=log.activity_counts(),
+        resource_counts=log.resource_counts(),
+        activity_labels=log.activity_labels,
+        resource_labels=log.resource_labels,
+    )
@@ -1,9 +1,19 @@
+from collections import OrderedDict
 from io import BytesIO
+import threading
 import streamlit as st
 import matplotlib.pyplot as plt
 import textwrap
 import pandas as pd
 
+# Rendered figures are cached as PNG bytes, keyed by (dataset fingerprint, viz key, parameters).
+# The cache is shared by all sessions (equal fingerprints mean equal data) and bounded in size;
+# the UI shows the cached bytes and the PDF export reuses the very same bytes.
+FIGURE_CACHE_MAX_BYTES = 256 * 1024 ** 2
+_figure_cache: OrderedDict = OrderedDict()
+_figure_cache_bytes = 0
+_figure_cache_lock = threading.Lock()
+
 def _ensure_viz_store():
     st.session_state.setdefault("viz_images", {"items": []})
 
@@ -18,24 +28,57 @@ def _upsert_viz_item(new_item: dict):
     else:
         items.append(new_item)
 
-def register_png_file_path(path: str, *, key: str, title: str, type_hint: str | None = None):
-    """Read a bitmap (e.g., PNG) from disk and register it for export."""
-    with open(path, "rb") as f:
-        data = f.read()
+def register_png_bytes(data: bytes, *, key: str, title: str, type_hint: str | None = None):
+    """Register PNG bytes for export."""
     _upsert_viz_item({
         "key": key, "title": title, "bytes": data,
         "mime": "image/png", "type": type_hint or "image"
     })
 
-def register_matplotlib_figure(fig, *, key: str, title: str, dpi: int = 150, type_hint: str | None = None):
-    """Save a Matplotlib figure as PNG bytes and register for PDF export."""
+def graphviz_to_png(gviz) -> bytes:
+    """Render a graphviz object (e.g. from a pm4py visualizer) to PNG bytes, without a file."""
+    return gviz.pipe(format="png")
+
+def figure_to_png(fig, *, dpi: int = 150) -> bytes:
+    """Save a Matplotlib figure as PNG bytes."""
     bio = BytesIO()
     fig.savefig(bio, format="png", dpi=dpi, bbox_inches="tight")
-    bio.seek(0)
-    _upsert_viz_item({
-        "key": key, "title": title, "bytes": bio.getvalue(),
-        "mime": "image/png", "type": type_hint or "image"
-    })
+    return bio.getvalue()
+
+# ---------- Rendered-figure cache ----------
+
+def lookup_cached_figure(key: tuple) -> bytes | None:
+    """Cached PNG bytes for a figure key (see figure_cache_key), or None."""
+    with _figure_cache_lock:
+        data = _figure_cache.get(key)
+        if data is not None:
+            _figure_cache.move_to_end(key)
+        return data
+
+def store_cached_figure(key: tuple, data: bytes) -> None:
+    """Add PNG bytes to the figure cache and evict least recently used figures over budget."""
+    global _figure_cache_bytes
+    with _figure_cache_lock:
+        if key in _figure_cache:
+            return
+        _figure_cache[key] = data
+        _figure_cache_bytes += len(data)
+        while _figure_cache_bytes > FIGURE_CACHE_MAX_BYTES and len(_figure_cache) > 1:
+            _, evicted = _figure_cache.popitem(last=False)
+            _figure_cache_bytes -= len(evicted)
+
+def figure_cache_key(fingerprint: str, viz_key: str, params: tuple, dpi: int = 150) -> tuple | None:
+    """Cache key of a figure; None (no caching) when there is no dataset fingerprint."""
+    return (fingerprint, viz_key, params, dpi) if fingerprint else None
+
+def cached_png(key: tuple | None, render) -> bytes:
+    """PNG bytes for a figure key, calling `render()` (-> bytes) only on a cache miss."""
+    data = lookup_cached_figure(key) if key else None
+    if data is None:
+        data = render()
+        if key:
+            store_cached_figure(key, data)
+    return data
 
 def register_dataframe_as_image(df, *, key: str, title: str, max_rows: int = 40, dpi: int = 150):
     """Render a pandas DataFrame as a Matplotlib table image and register it, with wrapped text for long cells."""
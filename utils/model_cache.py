@@ -0,0 +1,207 @@
+# utils/model_cache.py
+from __future__ import annotations
+
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from utils.log_cache import DEFAULT_CACHE_DIR
+
+# Discovered process models (model object + rendered PNG) and results derived from them (e.g.
+# their fitness) are cached on disk per dataset fingerprint and coverage threshold, next to the
+# cached logs. Entries are pickles written by this application only, so they share the trust
+# boundary of the cache directory itself; the file's mtime acts as the LRU clock.
+#
+# A single background worker precomputes the models for all positions of the coverage slider
+# right after upload. Pages request missing models from a separate small pool, so a request
+# never queues behind the precomputation. Computations are registered while they run, so a
+# model that is being computed is waited for instead of being discovered a second time.
+# Request futures are kept in memory until a page consumes them, so a page that stopped
+# waiting (time budget) picks up the finished model, or its error, even if it never reached
+# the disk (no fingerprint, write error, evicted in the meantime).
+
+# Bump whenever the layout of the cached entries changes, so stale entries are not reused
+MODEL_CACHE_VERSION = 1
+
+# Positions of the coverage slider on the process exploration page
+COVERAGE_STEPS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+DEFAULT_COVERAGE = 0.8
+DEFAULT_MODEL_CACHE_MAX_BYTES = 1024 ** 3   # 1 GB
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aid4de-models")
+_request_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="aid4de-model-requests")
+_inflight: dict[tuple, Future] = {}
+_precomputing: set[tuple] = set()
+_requests: dict[tuple, Future] = {}
+_lock = threading.Lock()
+
+# Finished requests kept for pages that may still come back for them (oldest dropped first)
+_MAX_FINISHED_REQUESTS = 32
+
+def _model_dir() -> Path:
+    """Directory holding the cached models (below AID4DE_CACHE_DIR, created on demand)."""
+    path = Path(os.getenv("AID4DE_CACHE_DIR", DEFAULT_CACHE_DIR)) / "models"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _model_budget() -> int:
+    """Size budget in bytes (AID4DE_MODEL_CACHE_MAX_BYTES)."""
+    try:
+        return int(os.getenv("AID4DE_MODEL_CACHE_MAX_BYTES", DEFAULT_MODEL_CACHE_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MODEL_CACHE_MAX_BYTES
+
+def _model_path(kind: str, fingerprint: str, coverage: float) -> Path:
+    return _model_dir() / f"{fingerprint}_{kind}_{round(coverage * 100):03d}.pkl"
+
+def load_cached_model(kind: str, fingerprint: str, coverage: float) -> dict | None:
+    """Cached entry (e.g. {"model": ..., "png": bytes}) of a `kind` of model (e.g. "bpmn") or None."""
+    path = _model_path(kind, fingerprint, coverage)
+    if not fingerprint or not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+    except Exception:
+        path.unlink(missing_ok=True)
+        return None
+    if entry.get("version") != MODEL_CACHE_VERSION:
+        return None
+    os.utime(path, None)
+    return entry
+
+def store_cached_model(kind: str, fingerprint: str, coverage: float, entry: dict) -> None:
+    """Persist a model entry and enforce the size budget (write errors only skip caching)."""
+    if not fingerprint:
+        return
+    path = _model_path(kind, fingerprint, coverage)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump({**entry, "version": MODEL_CACHE_VERSION}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        return
+    _evict_to_budget(keep=path)
+
+def purge_cached_models(fingerprints: list[str] | None = None) -> int:
+    """Delete the models of the given datasets (all models if None). Returns the number removed."""
+    removed = 0
+    for path in _model_dir().glob("*.pkl"):
+        if fingerprints is None or path.name.split("_", 1)[0] in fingerprints:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+def _evict_to_budget(keep: Path | None = None) -> None:
+    entries = sorted(_model_dir().glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in entries)
+    budget = _model_budget()
+    for path in entries:  # least recently used first
+        if total <= budget:
+            break
+        if path == keep:
+            continue
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+
+def request_status(kind: str, fingerprint: str, coverage: float) -> str:
+    """State of the submitted request (see submit_model): "running", "done", "failed" or "none"."""
+    with _lock:
+        future = _requests.get((kind, fingerprint, round(coverage * 100)))
+    if future is None:
+        return "none"
+    if not future.done():
+        return "running"
+    return "failed" if future.exception() is not None else "done"
+
+def consume_request(kind: str, fingerprint: str, coverage: float) -> None:
+    """Forget a finished request once the page has read its result or error."""
+    key = (kind, fingerprint, round(coverage * 100))
+    with _lock:
+        future = _requests.get(key)
+        if future is not None and future.done():
+            del _requests[key]
+
+def get_or_compute_model(kind: str, fingerprint: str, coverage: float, compute) -> dict:
+    """
+    Model entry for (kind, fingerprint, coverage): from disk, from a computation that is already
+    running (waits for it), or from `compute()` (-> {"model": ..., "png": bytes}), which is stored.
+    """
+    entry = load_cached_model(kind, fingerprint, coverage)
+    if entry is not None:
+        return entry
+
+    key = (kind, fingerprint, round(coverage * 100))
+    with _lock:
+        running = _inflight.get(key)
+        if running is None:
+            future = _inflight[key] = Future()
+    if running is not None:
+        return running.result()
+
+    try:
+        entry = compute()
+        store_cached_model(kind, fingerprint, coverage, entry)
+        future.set_result(entry)
+        return entry
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+def precompute_models(kind: str, fingerprint: str, compute_for, coverages=COVERAGE_STEPS) -> None:
+    """
+    Compute the models for all `coverages` in the background worker (once per dataset and kind).
+    `compute_for(coverage)` must not touch Streamlit state: it runs outside any script run.
+    """
+    with _lock:
+        if not fingerprint or (kind, fingerprint) in _precomputing:
+            return
+        _precomputing.add((kind, fingerprint))
+
+    def run():
+        try:
+            for coverage in coverages:
+                try:
+                    get_or_compute_model(kind, fingerprint, coverage, lambda: compute_for(coverage))
+                except Exception:
+                    # The page discovers (and reports) the model itself when it is needed
+                    continue
+        finally:
+            with _lock:
+                _precomputing.discard((kind, fingerprint))
+
+    _executor.submit(run)
+
+def submit_model(kind: str, fingerprint: str, coverage: float, compute) -> Future:
+    """
+    Future of the model entry for (kind, fingerprint, coverage); the lookup (and, if needed,
+    `compute()`) runs in the background, so the caller can bound how long it waits.
+    The computation continues after a timeout; its future stays available (request_status)
+    until consume_request() is called, and its result is cached.
+    """
+    key = (kind, fingerprint, round(coverage * 100))
+    with _lock:
+        pending = _requests.get(key)
+    if pending is not None:
+        return pending
+
+    entry = load_cached_model(kind, fingerprint, coverage)
+    if entry is not None:
+        done = Future()
+        done.set_result(entry)
+        return done
+    with _lock:
+        future = _requests.get(key)
+        if future is None:
+            future = _requests[key] = _request_executor.submit(get_or_compute_model, kind, fingerprint, coverage, compute)
+            finished = [k for k, f in _requests.items() if f.done()]
+            for k in finished[:max(len(finished) - _MAX_FINISHED_REQUESTS, 0)]:
+                del _requests[k]
+    return future
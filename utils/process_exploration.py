@@ -1,78 +1,290 @@
 # Importing libraries
 from __future__ import annotations
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import pm4py
+from pm4py.util import constants as pm4py_constants
+from pm4py.visualization.bpmn import visualizer as bpmn_visualizer
+from pm4py.visualization.dfg import visualizer as dfg_visualizer
+from pm4py.visualization.footprints import visualizer as fps_visualizer
 
 # Integrating utility functions
 from utils.state import init_session_state, attach_text_to_visual, set_viz_meta
-from utils.media import register_png_file_path, register_dataframe_as_image
+from utils.media import (
+    register_png_bytes, register_dataframe_as_image, graphviz_to_png, cached_png, figure_cache_key,
+    lookup_cached_figure, store_cached_figure, register_kv_table_for_export,
+)
+from utils.event_log import EventLog
+from utils.log_profile import LogProfile
+from utils.declare import discover_declare
+from utils.directly_follows import DirectlyFollows
+from utils.model_cache import (
+    COVERAGE_STEPS, DEFAULT_COVERAGE, consume_request, get_or_compute_model, precompute_models, request_status,
+    submit_model,
+)
+from utils.conformance import model_fitness
+
+# Seconds the page waits for the inductive BPMN model before it keeps the directly-follows
+# preview (AID4DE_BPMN_TIME_BUDGET, 0 = wait without limit)
+DEFAULT_BPMN_TIME_BUDGET = 30.0
+# The preview shows the most frequent directly-follows paths covering this share of all transitions
+DFG_PREVIEW_PATH_SHARE = 0.9
+DFG_PREVIEW_MAX_PATHS = 80
 
 init_session_state()
 
-@st.cache_data(show_spinner=False)
 def filter_variants_for_coverage(
     df: pd.DataFrame,
     coverage_threshold: float,
     *,
-    case_id_key: str,
-    activity_key: str,
-    timestamp_key: str,
-) -> pd.DataFrame:
-    variants_count = pm4py.get_variants(df, activity_key=activity_key, case_id_key=case_id_key, timestamp_key=timestamp_key)
-    sorted_variants = sorted(variants_count.items(), key=lambda x: x[1], reverse=True)
-    total_cases = sum(count for _, count in sorted_variants)
-
-    selected_variants, cumulative = set(), 0
-    for variant, count in sorted_variants:
-        cumulative += count; selected_variants.add(variant)
-        if total_cases and (cumulative / total_cases) >= coverage_threshold:
-            break
+    profile: LogProfile,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Keep the most frequent variants until `coverage_threshold` of the cases is covered.
+    Uses the coverage curve precomputed in the profile, so a threshold is a binary search
+    plus a boolean mask over the formatted frame.
+    Returns the filtered log and a boolean mask over case codes of the retained cases.
+    """
+    n_selected = profile.variants_for_coverage(coverage_threshold)
+    total_cases = profile.n_cases
 
-    case_variants = df.groupby(case_id_key)[activity_key].apply(tuple)
-    selected_case_ids = case_variants[case_variants.isin(selected_variants)].index
-    filtered_df = df[df[case_id_key].isin(selected_case_ids)].copy()
+    case_mask = profile.case_rank < n_selected
+    filtered_df = df[coverage_rows(profile, coverage_threshold)]
 
     set_viz_meta("proc_variant_filter", {
         "type": "filter",
         "title": "Variant coverage filter",
         "coverage_threshold": float(coverage_threshold),
-        "selected_variants_count": int(len(selected_variants)),
+        "selected_variants_count": int(n_selected),
         "total_cases": int(total_cases),
-        "retained_cases": int(filtered_df[case_id_key].nunique()),
+        "retained_cases": int(case_mask.sum()),
+    })
+    return filtered_df, case_mask
+
+def coverage_rows(profile: LogProfile, coverage_threshold: float) -> np.ndarray:
+    """Boolean mask over the rows of the formatted frame: events of the retained variants."""
+    return profile.frame_rank < profile.variants_for_coverage(coverage_threshold)
+
+# ---------- Cached discovery (keyed by dataset fingerprint and coverage) ----------
+
+# Datasets whose DECLARE rules stay cached, for every position of the coverage slider (least recently used dropped first)
+DECLARE_CACHE_DATASETS = 4
+
+@st.cache_data(show_spinner=False, max_entries=DECLARE_CACHE_DATASETS * len(COVERAGE_STEPS))
+def _discover_declare(
+    fingerprint: str, coverage_threshold: float, _log: EventLog, _profile: LogProfile, _case_mask: np.ndarray,
+) -> dict:
+    return discover_declare(_log, _profile, case_mask=_case_mask, templates=tuple(RELEVANT_CONSTRAINTS))
+
+# ---------- BPMN models (cached on disk per dataset and coverage, see model_cache.py) ----------
+
+def render_bpmn_png(bpmn) -> bytes:
+    """PNG of a BPMN model, same parameters as pm4py.vis.save_vis_bpmn but piped from graphviz."""
+    gviz = bpmn_visualizer.apply(bpmn, variant=bpmn_visualizer.Variants.CLASSIC, parameters={
+        "format": "png", "bgcolor": "white",
+        "enable_graph_title": pm4py_constants.DEFAULT_ENABLE_GRAPH_TITLES,
+        "rankdir": pm4py_constants.DEFAULT_RANKDIR_GVIZ, "set_rankdir": pm4py_constants.DEFAULT_RANKDIR_GVIZ,
+    })
+    return graphviz_to_png(gviz)
+
+def _bpmn_entry(df: pd.DataFrame) -> dict:
+    bpmn = pm4py.discover_bpmn_inductive(df)
+    return {"model": bpmn, "png": render_bpmn_png(bpmn)}
+
+def precompute_bpmn_models(df: pd.DataFrame, profile: LogProfile, *, fingerprint: str) -> None:
+    """
+    Discover and render the BPMN model of every coverage slider position in the background,
+    starting with the default position; finished models land in the on-disk model cache.
+    """
+    coverages = sorted(COVERAGE_STEPS, key=lambda c: abs(c - DEFAULT_COVERAGE))
+    precompute_models(
+        "bpmn", fingerprint,
+        lambda coverage: _bpmn_entry(df[coverage_rows(profile, coverage)]),
+        coverages=coverages,
+    )
+
+def _bpmn_time_budget() -> float | None:
+    """Time budget in seconds for the BPMN model (None: no limit)."""
+    try:
+        budget = float(os.getenv("AID4DE_BPMN_TIME_BUDGET", DEFAULT_BPMN_TIME_BUDGET))
+    except ValueError:
+        budget = DEFAULT_BPMN_TIME_BUDGET
+    return budget if budget > 0 else None
+
+def render_dfg_preview(dfg: DirectlyFollows, profile: LogProfile, *, case_mask: np.ndarray | None = None) -> bytes:
+    """
+    PNG of the frequency directly-follows graph of the retained cases, reduced to the most
+    frequent paths. Everything is read from the directly-follows matrix, so this takes milliseconds.
+    """
+    paths = dfg.top_paths(DFG_PREVIEW_PATH_SHARE, DFG_PREVIEW_MAX_PATHS)
+    ends = profile.end_activities(case_mask)
+    # Every event is followed by another one in its case or ends the case
+    outgoing = dfg.outgoing()
+    labels = dfg.activity_labels
+    activity_counts = {labels[i]: int(outgoing[i]) for i in np.flatnonzero(outgoing)}
+    for activity, count in ends.items():
+        activity_counts[activity] = activity_counts.get(activity, 0) + count
+    gviz = dfg_visualizer.apply(
+        dfg.to_dict(paths),
+        activities_count=activity_counts,
+        variant=dfg_visualizer.Variants.FREQUENCY,
+        parameters={
+            "format": "png",
+            "start_activities": profile.start_activities(case_mask),
+            "end_activities": ends,
+        },
+    )
+    return graphviz_to_png(gviz)
+
+def _register_preview(preview: bytes, coverage_threshold: float, note: str) -> None:
+    """Register the directly-follows preview for export in place of the BPMN model."""
+    title = f"Directly-follows graph ({int(coverage_threshold * 100)}% coverage)"
+    register_png_bytes(preview, key="proc_bpmn_filtered", title=title)
+    set_viz_meta("proc_bpmn_filtered", {
+        "type": "image", "title": title, "algorithm": "directly-follows graph (frequency, most frequent paths)",
+        "coverage_threshold": float(coverage_threshold), "note": note,
     })
-    return filtered_df
 
 def discover_bpmn_and_register(
     df: pd.DataFrame,
     *,
-    case_id_key: str,
-    activity_key: str,
-    timestamp_key: str,
+    dfg: DirectlyFollows,
+    profile: LogProfile,
+    case_mask: np.ndarray,
     coverage_threshold: float,
-) -> str:
-    bpmn = pm4py.discover_bpmn_inductive(df)
-    path = "bpmn_model_filtered.png"
-    pm4py.vis.save_vis_bpmn(bpmn, file_path=path)
+    fingerprint: str,
+    slot,
+) -> tuple[bytes, str]:
+    """
+    Show the process model of `df` (the log filtered to `coverage_threshold`) in `slot` (an
+    st.empty placeholder) and register it for export. Returns (PNG bytes, kind).
+
+    Cached BPMN models are shown right away. Otherwise a directly-follows preview is shown
+    while the inductive BPMN model is discovered in the background; it replaces the preview
+    if it is ready within the time budget. If not, the preview stays (kind "dfg") and the
+    discovery continues in the background (see wait_for_model). If the discovery failed, the
+    preview stays with the error (kind "failed").
+    """
+    pct = int(coverage_threshold * 100)
+    key = figure_cache_key(fingerprint, "proc_bpmn_filtered", (coverage_threshold,))
+    png = lookup_cached_figure(key) if key else None
+    if png is None:
+        future = submit_model("bpmn", fingerprint, coverage_threshold, lambda: _bpmn_entry(df))
+        preview = None
+        if not future.done():
+            preview = render_dfg_preview(dfg, profile, case_mask=case_mask)
+            slot.image(preview, caption=f"Preview: directly-follows graph ({pct}% coverage, most frequent paths) "
+                                        "- the BPMN model is being discovered ...")
+            try:
+                with st.spinner("Discovering the BPMN model ..."):
+                    future.result(timeout=_bpmn_time_budget())
+            except FutureTimeoutError:
+                _register_preview(preview, coverage_threshold,
+                                  "Shown instead of the inductive BPMN model, which exceeded the time budget.")
+                return preview, "dfg"
+            except Exception:
+                pass  # reported below
 
-    title = f"Filtered process model ({int(coverage_threshold*100)}% coverage)"
-    register_png_file_path(path, key="proc_bpmn_filtered", title=title)
+        consume_request("bpmn", fingerprint, coverage_threshold)
+        if future.exception() is not None:
+            if preview is None:
+                preview = render_dfg_preview(dfg, profile, case_mask=case_mask)
+            slot.image(preview, caption=f"Directly-follows graph ({pct}% coverage, most frequent paths)")
+            _register_preview(preview, coverage_threshold,
+                              "Shown instead of the inductive BPMN model, whose discovery failed.")
+            st.error(f"The BPMN model could not be discovered ({future.exception()}); "
+                     "the directly-follows graph is shown instead.")
+            return preview, "failed"
+        png = future.result()["png"]
+        if key:
+            store_cached_figure(key, png)
+
+    title = f"Filtered process model ({pct}% coverage)"
+    slot.image(png, caption=title)
+    register_png_bytes(png, key="proc_bpmn_filtered", title=title)
 
     set_viz_meta("proc_bpmn_filtered", {
         "type": "image", "title": title, "algorithm": "inductive BPMN",
         "coverage_threshold": float(coverage_threshold),
     })
-    return path
+    return png, "bpmn"
+
+@st.fragment(run_every=5)
+def wait_for_model(kind: str, fingerprint: str, coverage_threshold: float) -> None:
+    """
+    Poll a model request that missed the time budget and rerun the page once it has finished
+    or failed; the rerun reads the outcome, so the page stops rendering (and running) this poll.
+    """
+    if request_status(kind, fingerprint, coverage_threshold) != "running":
+        st.rerun()
+
+def _fitness_label(fitness: dict) -> str:
+    return f"{fitness['log_fitness']:.1%}" if fitness["cases"] else "–"
+
+def render_model_fitness(
+    df: pd.DataFrame, profile: LogProfile, *, coverage_threshold: float, fingerprint: str,
+) -> None:
+    """
+    Token-replay fitness of the BPMN model against all cases, the retained cases and the
+    filtered-out cases (see conformance.py); cached on disk per dataset and coverage.
+    The replay runs in the background under the BPMN time budget; if it takes longer, a
+    placeholder is shown and the page reruns once the fitness is ready (see wait_for_model).
+    """
+    def compute() -> dict:
+        bpmn = get_or_compute_model("bpmn", fingerprint, coverage_threshold, lambda: _bpmn_entry(df))["model"]
+        return {"fitness": model_fitness(bpmn, profile, profile.variants_for_coverage(coverage_threshold))}
+
+    future = submit_model("fitness", fingerprint, coverage_threshold, compute)
+    if not future.done():
+        try:
+            with st.spinner("Replaying the log on the process model ..."):
+                future.result(timeout=_bpmn_time_budget())
+        except FutureTimeoutError:
+            st.info("The fitness of the model is being computed in the background and appears here once it is ready.")
+            wait_for_model("fitness", fingerprint, coverage_threshold)
+            return
+        except Exception:
+            pass  # reported below
+
+    consume_request("fitness", fingerprint, coverage_threshold)
+    if future.exception() is not None:
+        st.warning(f"The fitness of the model could not be computed ({future.exception()}).")
+        return
+    fitness = future.result()["fitness"]
+
+    everything, retained, filtered_out = fitness["all"], fitness["retained"], fitness["filtered_out"]
+    st.markdown("**Model fitness** (token replay)")
+    st.metric("All cases", _fitness_label(everything),
+              help="Log fitness of the model over all cases; 100% means every case replays without missing or remaining tokens.")
+    st.metric("Fitting cases", f"{everything['perc_fit_traces']:.1f}%")
+    st.metric(f"Retained cases ({retained['cases']})", _fitness_label(retained))
+    st.metric(f"Filtered-out cases ({filtered_out['cases']})", _fitness_label(filtered_out))
+
+    set_viz_meta("proc_model_fitness", {
+        "type": "table", "title": "Model fitness (token-based replay)",
+        "coverage_threshold": float(coverage_threshold), "fitness": fitness,
+    })
+    register_kv_table_for_export(
+        [
+            ["Log fitness, all cases", _fitness_label(everything)],
+            ["Fitting cases", f"{everything['perc_fit_traces']:.1f}%"],
+            ["Average case fitness", f"{everything['average_trace_fitness']:.1%}"],
+            [f"Log fitness, retained cases ({retained['cases']})", _fitness_label(retained)],
+            [f"Log fitness, filtered-out cases ({filtered_out['cases']})", _fitness_label(filtered_out)],
+        ],
+        key="proc_model_fitness_tbl",
+        title=f"Model fitness ({int(coverage_threshold*100)}% coverage model, token-based replay)",
+    )
 
 def build_process_stats(
-    df: pd.DataFrame,
-    *,
-    case_id_key: str,
-    activity_key: str,
-    timestamp_key: str,
+    profile: LogProfile, *, case_mask: np.ndarray | None = None, dfg: DirectlyFollows | None = None,
 ) -> pd.DataFrame:
-    starts = pm4py.get_start_activities(df, activity_key=activity_key, case_id_key=case_id_key, timestamp_key=timestamp_key)
-    ends   = pm4py.get_end_activities(df,   activity_key=activity_key, case_id_key=case_id_key,   timestamp_key=timestamp_key)
+    starts = profile.start_activities(case_mask)
+    ends   = profile.end_activities(case_mask)
 
     rows = []
     if starts:
@@ -86,11 +298,27 @@ def build_process_stats(
             p = (cnt / total) if total else 0.0
             rows.append([f"Typical ending event #{i}", f"{ev}: {p:.2%}"])
 
+    transitions, slowest = {}, {}
+    if dfg is not None and dfg.n_pairs:
+        labels, sources, targets = dfg.activity_labels, dfg.sources, dfg.targets
+        total = int(dfg.counts.sum())
+        for i, pair in enumerate(dfg.top_paths(1.0, 3), start=1):
+            name = f"{labels[sources[pair]]} → {labels[targets[pair]]}"
+            transitions[name] = int(dfg.counts[pair])
+            rows.append([f"Most frequent transition #{i}", f"{name}: {dfg.counts[pair] / total:.2%}"])
+        mean_days = dfg.mean_durations() / 86400
+        for i, pair in enumerate(np.argsort(-mean_days, kind="stable")[:3], start=1):
+            name = f"{labels[sources[pair]]} → {labels[targets[pair]]}"
+            slowest[name] = round(float(mean_days[pair]), 2)
+            rows.append([f"Slowest transition #{i}", f"{name}: {mean_days[pair]:.2f} days on average"])
+
     set_viz_meta("proc_stats_summary", {
         "type": "table",
         "title": "Process-centric headline stats",
         "top_start_activities": dict(sorted(starts.items(), key=lambda x: x[1], reverse=True)[:5]) if starts else {},
         "top_end_activities":   dict(sorted(ends.items(),   key=lambda x: x[1], reverse=True)[:5]) if ends else {},
+        "top_transitions": transitions,
+        "slowest_transitions_days": slowest,
     })
     return pd.DataFrame(rows, columns=["Statistic", "Value"])
 
@@ -100,13 +328,15 @@ RELEVANT_CONSTRAINTS = {
     "precedence": "An activity can occur only if another occurred earlier in the case.",
 }
 
-def render_declare_model(df: pd.DataFrame) -> None:
+def render_declare_model(
+    log: EventLog, profile: LogProfile, *, case_mask: np.ndarray, coverage_threshold: float, fingerprint: str,
+) -> None:
     """
-    Discover DECLARE constraints, show only the RELEVANT_CONSTRAINTS in the UI,
+    Discover the DECLARE constraints of the RELEVANT_CONSTRAINTS templates, show them in the UI,
     and register a single combined table for the PDF export (proc_declare_summary)
     with a legend containing concise explanations. No feedback handling here.
     """
-    declare_model = pm4py.discover_declare(df)
+    declare_model = _discover_declare(fingerprint, coverage_threshold, log, profile, case_mask)
 
     meta_counts = {k: (len(v) if isinstance(v, dict) else 0) for k, v in declare_model.items()}
     set_viz_meta(
@@ -190,17 +420,22 @@ def render_declare_model(df: pd.DataFrame) -> None:
                 text="\n".join(legend_lines),
             )
 
-def discover_footprints_and_register(df: pd.DataFrame, *, coverage_threshold: float) -> None:
-    fp = pm4py.discover_footprints(df)
-    path = "footprint_model_filtered.png"
-    pm4py.vis.save_vis_footprints(fp, file_path=path)
+def discover_footprints_and_register(dfg: DirectlyFollows, *, coverage_threshold: float, fingerprint: str) -> None:
+    """Draw the footprint table of the retained cases straight from their directly-follows matrix."""
+    def render() -> bytes:
+        gviz = fps_visualizer.apply(dfg.footprints(), parameters={
+            "format": "png", "enable_graph_title": pm4py_constants.DEFAULT_ENABLE_GRAPH_TITLES,
+        })
+        return graphviz_to_png(gviz)
+
+    png = cached_png(figure_cache_key(fingerprint, "proc_footprints_filtered", (coverage_threshold,)), render)
 
     title = f"Filtered footprint model ({int(coverage_threshold*100)}% coverage)"
-    register_png_file_path(path, key="proc_footprints_filtered", title=title)
+    register_png_bytes(png, key="proc_footprints_filtered", title=title)
 
     set_viz_meta("proc_footprints_filtered", {
         "type": "image", "title": title,
         "legend": {">": "row precedes column", "<": "column precedes row", "||": "parallel", "#": "no relation"}
     })
 
-    st.image(path, caption=title, use_container_width=True)
+    st.image(png, caption=title, use_container_width=True)
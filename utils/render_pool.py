@@ -0,0 +1,180 @@
+# utils/render_pool.py
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from multiprocessing import context as mp_context, spawn
+
+import streamlit as st
+
+from utils.charts import render_png
+from utils.media import figure_cache_key, lookup_cached_figure, register_png_bytes, store_cached_figure
+
+# Chart rendering in a pool of worker processes. Figure builders (utils/charts.py) receive
+# pre-aggregated inputs, so only a few KB travel to the workers and PNG bytes come back.
+# Inside a `render_batch()` block all charts are submitted first and collected at the end,
+# so a section takes about as long as its slowest chart; outside a batch, or with
+# AID4DE_RENDER_WORKERS=0, charts are rendered inline on the script thread.
+# Other CPU-bound work that splits into independent chunks (e.g. token replay of variants)
+# runs in the same pool through submit_task().
+#
+# The pool pays off on hosts with several cores: a section's charts (and replay chunks) run
+# side by side instead of one after another. On a single core they would only queue up behind
+# each other plus the pickling overhead, so the pool is off there by default.
+#
+# Workers are spawned ("spawn": the server process runs threads). A spawned process imports
+# the parent's __main__ again, and Streamlit installs the running page as __main__, so workers
+# would run the page script. They are started from utils/_render_worker.py instead (see
+# _preparation_data).
+
+_CPUS = os.cpu_count() or 1
+DEFAULT_RENDER_WORKERS = min(8, _CPUS) if _CPUS > 1 else 0
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_batch: ContextVar[list | None] = ContextVar("render_batch", default=None)
+
+def _render_workers() -> int:
+    """Number of worker processes (AID4DE_RENDER_WORKERS, 0 disables the pool)."""
+    try:
+        return max(0, int(os.getenv("AID4DE_RENDER_WORKERS", DEFAULT_RENDER_WORKERS)))
+    except ValueError:
+        return DEFAULT_RENDER_WORKERS
+
+_WORKER_NAME = "aid4de-render-worker"
+_WORKER_MAIN = "utils._render_worker"
+_get_preparation_data = getattr(spawn.get_preparation_data, "__wrapped__", spawn.get_preparation_data)
+
+def _preparation_data(name: str) -> dict:
+    """spawn.get_preparation_data, with utils._render_worker as the main module of pool workers."""
+    data = _get_preparation_data(name)
+    if name.startswith(_WORKER_NAME + "-"):
+        data.pop("init_main_from_path", None)
+        data["init_main_from_name"] = _WORKER_MAIN
+    return data
+
+# multiprocessing has no per-context hook for the main module of a spawned child; it always
+# follows sys.modules["__main__"], which Streamlit replaces on every script run. Wrapping the
+# function that reads it is installed once at import and only changes the preparation data of
+# processes named by _WorkerProcess; every other spawn in the process passes through unchanged.
+_preparation_data.__wrapped__ = _get_preparation_data
+spawn.get_preparation_data = _preparation_data
+
+class _WorkerProcess(mp_context.SpawnProcess):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = f"{_WORKER_NAME}-{':'.join(str(i) for i in self._identity)}"
+
+class _WorkerContext(mp_context.SpawnContext):
+    Process = _WorkerProcess
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    """Shared pool, started on first use; workers are spawned as work arrives."""
+    global _executor
+    workers = _render_workers()
+    if workers == 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=_WorkerContext())
+        return _executor
+
+def _reset_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def pool_workers() -> int:
+    """Number of worker processes of the pool (0: everything runs inline)."""
+    return _render_workers()
+
+def submit_task(fn, *args) -> Future:
+    """
+    Run `fn(*args)` in the pool; `fn` must be a module-level function and the arguments
+    picklable. Runs inline when the pool is disabled or cannot accept work.
+    """
+    executor = _get_executor()
+    if executor is not None:
+        try:
+            return executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            _reset_executor()
+    done = Future()
+    done.set_result(fn(*args))
+    return done
+
+def _inline(builder, inputs: dict, dpi: int) -> Future:
+    done = Future()
+    done.set_result(render_png(builder, inputs, dpi))
+    return done
+
+def _submit(builder, inputs: dict, dpi: int) -> Future:
+    executor = _get_executor()
+    if executor is not None:
+        try:
+            return executor.submit(render_png, builder, inputs, dpi)
+        except (BrokenProcessPool, RuntimeError):
+            _reset_executor()
+    return _inline(builder, inputs, dpi)
+
+def _result(future: Future, builder, inputs: dict, dpi: int) -> bytes:
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory): render this chart inline and restart the pool later
+        _reset_executor()
+        return render_png(builder, inputs, dpi)
+
+def _show(slot, png: bytes, *, viz_key: str, title: str) -> None:
+    slot.image(png, use_container_width=True)
+    register_png_bytes(png, key=viz_key, title=title)
+
+def render_chart(slot, builder, inputs: dict, *, fingerprint: str, viz_key: str, title: str,
+                 params: tuple = (), dpi: int = 150) -> None:
+    """
+    Show the chart `builder(**inputs)` in `slot` (an st.empty placeholder) and register it for export.
+    Cached PNGs are shown right away; otherwise the chart is rendered in the pool and, inside
+    a render_batch(), shown when the batch is collected.
+    """
+    key = figure_cache_key(fingerprint, viz_key, params, dpi)
+    png = lookup_cached_figure(key) if key else None
+    if png is not None:
+        _show(slot, png, viz_key=viz_key, title=title)
+        return
+
+    pending = _batch.get()
+    if pending is None:
+        _collect([(slot, _inline(builder, inputs, dpi), builder, inputs, dpi, key, viz_key, title)])
+    else:
+        pending.append((slot, _submit(builder, inputs, dpi), builder, inputs, dpi, key, viz_key, title))
+
+def _collect(jobs: list) -> None:
+    # In submission order, so export items keep the order of the page
+    for slot, future, builder, inputs, dpi, key, viz_key, title in jobs:
+        try:
+            png = _result(future, builder, inputs, dpi)
+        except Exception as e:
+            slot.warning(f"Could not render '{title}': {e}")
+            continue
+        if key:
+            store_cached_figure(key, png)
+        _show(slot, png, viz_key=viz_key, title=title)
+
+@contextmanager
+def render_batch():
+    """Defer the charts rendered inside the block and collect them together at its end."""
+    pending: list = []
+    token = _batch.set(pending)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        if pending:
+            with st.spinner("Rendering charts ..."):
+                _collect(pending)
@@ -6,14 +6,63 @@ def init_session_state():
     st.session_state.setdefault("viz_images", {"items": []})  # [{"key": str, "title": str, "bytes": b"..."}]
     st.session_state.setdefault("viz_data", {})
 
-def feedback_input(label: str, key: str, height: int = 100, placeholder: str = "Please share your thoughts..."):
-    """Render text area for feedback."""
-    st.text_area(label=label, key=key, height=height, placeholder=placeholder)
+def dataset_fingerprint() -> str:
+    """
+    Fingerprint of the uploaded dataset (content hash of the upload and its column mapping),
+    computed once at upload. It keys the caches shared by all sessions: the parsed log on disk
+    (log_cache), discovered process models and their fitness on disk (model_cache) and the
+    rendered figures in memory (media); the DECLARE rules are kept in a bounded st.cache_data.
+    """
+    return st.session_state.get("dataset_fingerprint", "")
+
+def feedback_input(
+    label: str,
+    key: str,
+    height: int = 100,
+    placeholder: str = "Please share your thoughts...",
+    *,
+    viz_key: str | None = None,
+):
+    """
+    Render text area for feedback.
+    With `viz_key`, the text area lives in its own fragment and an on_change callback binds the
+    text to that visualization, so committing a comment reruns only the text area, not the
+    charts and analytics of the page.
+    """
+    if viz_key is None:
+        st.text_area(label=label, key=key, height=height, placeholder=placeholder)
+        return
+    _feedback_fragment(label, key, height, placeholder, viz_key)
+
+@st.fragment
+def _feedback_fragment(label: str, key: str, height: int, placeholder: str, viz_key: str):
+    # Widget state is dropped when leaving the page; restore the text already stored
+    saved = st.session_state.feedbacks.get(f"feedback__{viz_key}")
+    if key not in st.session_state and saved:
+        st.session_state[key] = saved["text"]
+    st.text_area(
+        label=label, key=key, height=height, placeholder=placeholder,
+        on_change=attach_text_to_visual, args=(viz_key, label),
+        kwargs={"kind": "feedback", "from_input_key": key},
+    )
 
 def set_viz_meta(key: str, meta: dict):
     """Store rich metadata for a given visualization key."""
     st.session_state.viz_data[key] = meta or {}
 
+def registered_viz_keys() -> set:
+    """Keys of all visualizations registered for the export (images, tables) or the chatbot context (metadata)."""
+    items = st.session_state.get("viz_images", {}).get("items", [])
+    return {it.get("key") for it in items} | set(st.session_state.get("viz_data", {}))
+
+def unregister_viz(keys) -> None:
+    """Drop visualizations from the export and the chatbot context; feedback texts are kept."""
+    keys = set(keys)
+    store = st.session_state.get("viz_images", {"items": []})
+    store["items"] = [it for it in store["items"] if it.get("key") not in keys]
+    for key in keys:
+        st.session_state.get("viz_data", {}).pop(key, None)
+
 def attach_text_to_visual(
     viz_key: str,
     label: str,
@@ -0,0 +1,193 @@
+# utils/temporal.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.event_log import EventLog
+
+# Calendar distributions of the events in one pass over the encoded log. Timestamps are shifted
+# to wall-clock time once and split into whole days and hour of day; the events are counted per
+# hour and per day with np.bincount. Day of week, day of month, month, year and ISO week are
+# then derived for the (few) distinct days only and summed with weighted bincounts.
+#
+# Events over time are counted per time bucket, again with one np.bincount: the bucket width
+# is the finest step of a fixed ladder (seconds ... years) that keeps the number of buckets
+# bounded, so the cost is linear in the events and the series size does not depend on them.
+# Series longer than the chart's pixel budget are thinned with LTTB (largest triangle three
+# buckets), which keeps peaks and dips that plain striding would drop.
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+DISTR_TYPES = ("days_week", "days_month", "months", "years", "hours", "weeks")
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Dense per-day counts as long as the day range is not much larger than the log itself
+_MAX_DENSE_DAYS = 1 << 20
+
+# Bucket widths for events over time: (name, fixed width in ns, or None for calendar months/years)
+TIME_BUCKETS = (
+    ("second", NS_PER_SECOND), ("minute", NS_PER_MINUTE), ("5 minutes", 5 * NS_PER_MINUTE),
+    ("15 minutes", 15 * NS_PER_MINUTE), ("hour", NS_PER_HOUR), ("6 hours", 6 * NS_PER_HOUR),
+    ("day", NS_PER_DAY), ("week", 7 * NS_PER_DAY), ("month", None), ("year", None),
+)
+_MONDAY_SHIFT = 3 * NS_PER_DAY  # 1970-01-01 was a Thursday; week buckets start on Mondays
+DEFAULT_MAX_BUCKETS = 2000
+DEFAULT_MAX_POINTS = 1000  # below the pixel width of the chart
+
+@dataclass(frozen=True)
+class EventDistribution:
+    distr_type: str
+    x_label: str
+    labels: list         # x values: day names for days_week, integers otherwise
+    counts: np.ndarray   # int64 number of events, per label
+
+    def as_dict(self) -> dict:
+        return {label: int(c) for label, c in zip(self.labels, self.counts)}
+
+@dataclass(frozen=True)
+class EventsOverTime:
+    bucket: str          # bucket width, e.g. "hour" (see TIME_BUCKETS)
+    starts: np.ndarray   # datetime64[ns] wall-clock start, per bucket
+    counts: np.ndarray   # int64 number of events, per bucket
+
+    @property
+    def n_buckets(self) -> int:
+        return int(len(self.counts))
+
+    def downsampled(self, max_points: int = DEFAULT_MAX_POINTS) -> tuple[np.ndarray, np.ndarray]:
+        """(starts, counts) thinned to at most `max_points` points with LTTB."""
+        keep = lttb_indices(self.starts.astype(np.int64), self.counts, max_points)
+        return self.starts[keep], self.counts[keep]
+
+def wall_clock_ns(log: EventLog) -> np.ndarray:
+    """Event timestamps as int64 ns of local (wall-clock) time in the log's timezone."""
+    if log.tz is None:
+        return log.timestamps
+    return log.to_datetime(log.timestamps).tz_localize(None).asi8
+
+def _day_counts(days: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(distinct days since the epoch, events per day)."""
+    first, last = int(days.min()), int(days.max())
+    if last - first < max(_MAX_DENSE_DAYS, len(days)):
+        counts = np.bincount(days - first)
+        present = np.flatnonzero(counts)
+        return present + first, counts[present]
+    return np.unique(days, return_counts=True)
+
+def _calendar_parts(days: np.ndarray) -> dict[str, np.ndarray]:
+    """Calendar fields (int64 arrays) of days since 1970-01-01."""
+    dates = days.astype("datetime64[D]")
+    month_start = dates.astype("datetime64[M]")
+    weekday = (days + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    # The ISO week of a day is the week of that week's Thursday within the Thursday's year
+    thursday = (days - weekday + 3).astype("datetime64[D]")
+    iso_week = (thursday - thursday.astype("datetime64[Y]")).astype(np.int64) // 7 + 1
+    return {
+        "days_week": weekday,
+        "days_month": (dates - month_start).astype(np.int64) + 1,
+        "months": month_start.astype(np.int64) % 12 + 1,
+        "years": dates.astype("datetime64[Y]").astype(np.int64) + 1970,
+        "weeks": iso_week,
+    }
+
+def _weighted_counts(values: np.ndarray, weights: np.ndarray, first: int, last: int) -> np.ndarray:
+    """Sum of weights per value in first..last (every value listed, zeros included)."""
+    counts = np.bincount(values - first, weights=weights, minlength=last - first + 1)
+    return counts.astype(np.int64)
+
+def compute_event_distributions(log: EventLog) -> dict[str, EventDistribution]:
+    """
+    Event counts by day of week, day of month, month, year, hour of day and ISO week
+    (keyed by the distr_type names of pm4py.vis.save_vis_events_distribution_graph).
+    """
+    if log.n_events == 0:
+        return {}
+
+    wall = wall_clock_ns(log)
+    days, time_of_day = np.divmod(wall, NS_PER_DAY)
+    hour_counts = np.bincount(time_of_day // NS_PER_HOUR, minlength=24)
+
+    distinct_days, day_counts = _day_counts(days)
+    parts = _calendar_parts(distinct_days)
+    years = parts["years"]
+
+    def distribution(distr_type: str, x_label: str, first: int, last: int) -> EventDistribution:
+        counts = _weighted_counts(parts[distr_type], day_counts, first, last)
+        return EventDistribution(distr_type, x_label, list(range(first, last + 1)), counts)
+
+    distributions = {
+        "days_week": EventDistribution("days_week", "Day of Week", list(DAY_NAMES),
+                                       _weighted_counts(parts["days_week"], day_counts, 0, 6)),
+        "days_month": distribution("days_month", "Day of Month", 1, 31),
+        "months": distribution("months", "Month", 1, 12),
+        "years": distribution("years", "Year", int(years.min()), int(years.max())),
+        "hours": EventDistribution("hours", "Hour of Day", list(range(24)), hour_counts.astype(np.int64)),
+        "weeks": distribution("weeks", "ISO Week", 1, 53),
+    }
+    return {distr_type: distributions[distr_type] for distr_type in DISTR_TYPES}
+
+def _bucket_codes(wall: np.ndarray, bucket: str, width: int | None) -> np.ndarray:
+    """int64 bucket number (counted from the epoch) of every wall-clock timestamp."""
+    if width is None:
+        unit = "datetime64[M]" if bucket == "month" else "datetime64[Y]"
+        return wall.astype("datetime64[ns]").astype(unit).astype(np.int64)
+    if bucket == "week":
+        return (wall + _MONDAY_SHIFT) // width
+    return wall // width
+
+def _bucket_starts(codes: np.ndarray, bucket: str, width: int | None) -> np.ndarray:
+    if width is None:
+        unit = "datetime64[M]" if bucket == "month" else "datetime64[Y]"
+        return codes.astype(unit).astype("datetime64[ns]")
+    if bucket == "week":
+        return (codes * width - _MONDAY_SHIFT).astype("datetime64[ns]")
+    return (codes * width).astype("datetime64[ns]")
+
+def events_over_time(log: EventLog, max_buckets: int = DEFAULT_MAX_BUCKETS) -> EventsOverTime | None:
+    """
+    Number of events per time bucket (wall-clock time, empty buckets included), using the finest
+    bucket width of TIME_BUCKETS that yields at most `max_buckets` buckets. None for an empty log.
+    """
+    if log.n_events == 0:
+        return None
+    wall = wall_clock_ns(log)
+    span = np.array([wall.min(), wall.max()])
+    for bucket, width in TIME_BUCKETS:
+        first, last = _bucket_codes(span, bucket, width)
+        if last - first < max_buckets:
+            break
+    counts = np.bincount(_bucket_codes(wall, bucket, width) - first, minlength=int(last - first) + 1)
+    starts = _bucket_starts(np.arange(first, last + 1), bucket, width)
+    return EventsOverTime(bucket=bucket, starts=starts, counts=counts.astype(np.int64))
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by LTTB (Steinarsson, 2013) when reducing the series (x, y) to
+    `n_out` points. First and last point are always kept; one point per inner bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = (x - x[0]).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        # Pick the point of the bucket spanning the largest triangle with the last kept point
+        # and the average of the next bucket
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
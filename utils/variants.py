@@ -0,0 +1,84 @@
+# utils/variants.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.event_log import EventLog
+
+# Variant computation over the case index of an EventLog. Every case's activity-code sequence
+# is hashed with two polynomial hashes (uint64 arithmetic, wrapping) in a handful of NumPy
+# passes; cases sharing a (length, hash, hash) key form a variant. Hash groups are verified
+# element-wise afterwards, so a collision never merges two different variants.
+
+_HASH_BASES = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F))
+
+@dataclass(frozen=True)
+class Variants:
+    case_variant: np.ndarray     # int64 variant id, per case code
+    counts: np.ndarray           # int64 number of cases, per variant id
+    representatives: np.ndarray  # int64 case code of the first case, per variant id
+    sequences: list              # variant id -> tuple of activity labels
+
+    @property
+    def n_variants(self) -> int:
+        return int(len(self.counts))
+
+def _powers(base: np.uint64, n: int) -> np.ndarray:
+    """base**0 .. base**(n-1) modulo 2**64."""
+    powers = np.full(max(n, 1), base, dtype=np.uint64)
+    powers[0] = 1
+    with np.errstate(over="ignore"):
+        return np.cumprod(powers, dtype=np.uint64)
+
+def _case_hashes(log: EventLog, position: np.ndarray) -> np.ndarray:
+    """(n_cases, 3) uint64 keys: case length and two sequence hashes."""
+    cases = log.cases
+    symbols = log.activity_codes.astype(np.uint64) + np.uint64(1)
+    max_len = int(cases.lengths.max()) if cases.n_cases else 0
+    keys = [cases.lengths.astype(np.uint64)]
+    with np.errstate(over="ignore"):
+        for base in _HASH_BASES:
+            keys.append(cases.reduce(np.add, symbols * _powers(base, max_len)[position]))
+    return np.column_stack(keys)
+
+def _exact_ids(log: EventLog) -> np.ndarray:
+    """Fallback: group cases by their exact code sequence (only used on a hash collision)."""
+    index: dict[bytes, int] = {}
+    cases = log.cases
+    return np.fromiter(
+        (index.setdefault(cases.view(log.activity_codes, c).tobytes(), len(index)) for c in range(cases.n_cases)),
+        dtype=np.int64, count=cases.n_cases,
+    )
+
+def compute_variants(log: EventLog) -> Variants:
+    """
+    Group the cases of `log` into variants (activity sequences).
+    Variant ids follow the order in which variants first occur in the case-sorted log, which is
+    the order of pm4py.get_variants on the formatted DataFrame.
+    """
+    cases = log.cases
+    if cases.n_cases == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return Variants(case_variant=empty, counts=empty, representatives=empty, sequences=[])
+
+    position = cases.position_in_case()
+    keys = _case_hashes(log, position)
+    _, first_case, hash_ids = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    hash_ids = hash_ids.ravel()
+
+    # Every case must match its group's first case event by event
+    event_ids = cases.expand(hash_ids)
+    reference = cases.starts[first_case][event_ids] + position
+    if np.array_equal(log.activity_codes, log.activity_codes[reference]):
+        rank = np.empty(len(first_case), dtype=np.int64)
+        rank[np.argsort(first_case, kind="stable")] = np.arange(len(first_case))
+        case_variant = rank[hash_ids]
+    else:
+        case_variant = _exact_ids(log)
+
+    counts = np.bincount(case_variant)
+    _, representatives = np.unique(case_variant, return_index=True)
+    sequences = [tuple(log.activity_labels[cases.view(log.activity_codes, c)]) for c in representatives]
+    return Variants(case_variant=case_variant, counts=counts, representatives=representatives, sequences=sequences)
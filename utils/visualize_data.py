@@ -1,76 +1,77 @@
 # Importing libraries
 import streamlit as st
-import matplotlib.pyplot as plt
 import pm4py
 import pandas as pd
-from collections import Counter
 import numpy as np
-import seaborn as sns
+from datetime import timedelta
 
 # Integrating utility functions
-from utils.state import init_session_state, feedback_input, attach_text_to_visual, set_viz_meta 
-from utils.media import register_matplotlib_figure, register_png_file_path, register_dataframe_as_image, register_kv_table_for_export
+from utils.state import init_session_state, feedback_input, set_viz_meta, dataset_fingerprint, registered_viz_keys, unregister_viz
+from utils.media import register_dataframe_as_image, register_kv_table_for_export
+from utils.render_pool import render_chart, render_batch
+from utils import charts
+from utils.case_durations import compute_case_durations
+from utils.temporal import compute_event_distributions, events_over_time
+from utils.dotted_chart import dotted_chart_grid
 
 # Ensure session scaffolding exists
 init_session_state()  
 
 # ---------- Small helper to reduce boilerplate ----------
-def finalize_plot(fig, *, viz_key: str, title: str, fb_key: str, fb_label: str, dpi: int = 150):
+def finalize_plot(builder, inputs: dict, *, viz_key: str, title: str, fb_key: str, fb_label: str, params: tuple = (), dpi: int = 150):
     """
     Common tail for matplotlib plots:
-    - Register figure bytes for the report.
+    - Render `builder(**inputs)` (see utils/charts.py) unless it is cached for (dataset, viz_key, params);
+      inside a render_batch() the rendering runs in the render pool, in parallel with other charts.
+    - Show the PNG bytes and register the same bytes for the report.
     - Render feedback input + bind to the same visualization key.
     """
-    st.pyplot(fig)
-    register_matplotlib_figure(fig, key=viz_key, title=title, dpi=dpi)
-    feedback_input(fb_label, fb_key)
-    attach_text_to_visual(viz_key, fb_label, kind="feedback", from_input_key=fb_key)
-    plt.close(fig)
+    slot = st.empty()
+    render_chart(slot, builder, inputs, fingerprint=dataset_fingerprint(), viz_key=viz_key, title=title, params=params, dpi=dpi)
+    feedback_input(fb_label, fb_key, viz_key=viz_key)
+
+def _hidden_caption(table, k: int, noun: str, relative: bool = False):
+    """Caption summarizing the values beyond the top k (count and share, plus the largest of them)."""
+    tail = table.tail(k)
+    if not tail.n_values:
+        return
+    if relative:
+        largest = ", ".join(f"{name} ({round(count * 100 / table.total, 2)}%)" for name, count in tail.head)
+    else:
+        largest = ", ".join(f"{name} ({count})" for name, count in tail.head)
+    if tail.n_values > len(tail.head):
+        largest += ", ..."
+    st.caption(f"Not shown in chart: {tail.n_values} {noun} with {tail.count} events "
+               f"({round(tail.share, 2)}%): {largest}")
 
 # ---------- Plots, visualizations & statistics ----------
 
 # Generating absolute activity frequency plot within frequency & distribution analysis
-def plot_absolute_activity_frequency(df, activity_key):
+def plot_absolute_activity_frequency(activities):
     try:
-        activity_counts = Counter(df[activity_key])
-        sorted_activities = sorted(activity_counts.items(), key=lambda x: x[1], reverse=True)
         max_activities = 20
+        top = activities.top(max_activities)
+        if activities.n_values > max_activities:
+            st.info(f"Showing top {max_activities} of {activities.n_values} activities.")
 
-        if len(sorted_activities) > max_activities:
-            top_activities = sorted_activities[:max_activities]
-            hidden_activities = sorted_activities[max_activities:]
-            st.info(f"Showing top {max_activities} of {len(activity_counts)} activities.")
-        else:
-            top_activities = sorted_activities
-            hidden_activities = []
-        
-        activities, frequencies = zip(*top_activities)
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.bar(range(len(activities)), frequencies, color="skyblue", edgecolor='black')
-        ax.set_xticks(range(len(activities)))
-        ax.set_xticklabels(activities, rotation=45, ha="right")
-        ax.set_xlabel('Activities')
-        ax.set_ylabel('Frequencies')
         title = 'Absolute Activity Frequency Histogram'
-        ax.set_title(title)
-        
 
-        if hidden_activities:
-            hidden_text = ", ".join([f"{name} ({count})" for name, count in hidden_activities])
-            st.caption(f"Not shown in chart: {hidden_text}")
+        inputs = dict(labels=list(activities.labels[top]), values=activities.counts[top].tolist(), title=title,
+                      xlabel='Activities', ylabel='Frequencies')
+
+        _hidden_caption(activities, max_activities, "activities")
 
         set_viz_meta("absolute_activity_frequency_graph", {
             "type": "bar_chart",
             "title": title,
             "x_axis": "Activities",
             "y_axis": "Frequencies",
-            "top_activities": dict(sorted_activities[:5]),
-            "total_activities": int(sum(activity_counts.values()))
+            "top_activities": dict(activities.items(top[:5])),
+            "total_activities": activities.total
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="absolute_activity_frequency",
             title=title,
             fb_key="feedback_absolute_activity_frequency",
@@ -81,53 +82,32 @@ def plot_absolute_activity_frequency(df, activity_key):
         st.warning(f"Could not render activity frequencies: {e}")
 
 # Generating relative activity frequency plot within frequency & distribution analysis
-def plot_relative_activity_frequency(df, activity_key):
+def plot_relative_activity_frequency(activities):
     try:
-        activity_counts = Counter(df[activity_key])
-        total_activities = sum(activity_counts.values()) 
-
-        relative_activity_freq = {
-            activity: (count / total_activities) * 100
-            for activity, count in activity_counts.items()
-        }
-
-        sorted_activities = sorted(relative_activity_freq.items(), key=lambda x: x[1], reverse=True)
-
         max_activities = 20
-        if len(sorted_activities) > max_activities:
-            top_activities = sorted_activities[:max_activities]
-            hidden_activities = sorted_activities[max_activities:]
-            st.info(f"Showing top {max_activities} of {len(activity_counts)} activities.")
-        else:
-            top_activities = sorted_activities
-            hidden_activities = []
+        top = activities.top(max_activities)
+        if activities.n_values > max_activities:
+            st.info(f"Showing top {max_activities} of {activities.n_values} activities.")
 
-        activities, percentages = zip(*top_activities)
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.bar(range(len(activities)), percentages, color="lightsalmon", edgecolor='black')
-        ax.set_xticks(range(len(activities)))
-        ax.set_xticklabels(activities, rotation=45, ha="right")
-        ax.set_xlabel('Activities')
-        ax.set_ylabel('Relative Frequency (%)')
+        percentages = activities.shares(top)
         title = 'Relative Activity Frequency Histogram'
-        ax.set_title(title)
 
-        if hidden_activities:
-            hidden_text = ", ".join([f"{name} ({round(percent, 2)}%)" for name, percent in hidden_activities])
-            st.caption(f"Not shown in chart: {hidden_text}")
+        inputs = dict(labels=list(activities.labels[top]), values=percentages.tolist(), title=title,
+                      xlabel='Activities', ylabel='Relative Frequency (%)', color="lightsalmon")
+
+        _hidden_caption(activities, max_activities, "activities", relative=True)
 
         set_viz_meta("relative_activity_frequency_graph", {
             "type": "bar_chart",
             "title": title,
             "x_axis": "Activities",
             "y_axis": "Relative Frequency (%)",
-            "top_activities": {activity: round(percent, 2) for activity, percent in sorted_activities[:5]},
-            "total_activities": int(total_activities)
+            "top_activities": {activities.labels[c]: round(float(p), 2) for c, p in zip(top[:5], percentages)},
+            "total_activities": activities.total
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="relative_activity_frequency",
             title=title,
             fb_key="feedback_relative_activity_frequency",
@@ -138,14 +118,9 @@ def plot_relative_activity_frequency(df, activity_key):
         st.warning(f"Could not render activity frequencies: {e}")
 
 # Generating absolute case frequency plot within frequency & distribution analysis
-def plot_absolute_case_frequency(df, case_id_key, activity_key, timestamp_key):
+def plot_absolute_case_frequency(profile):
     try:
-        variants = pm4py.get_variants(
-            df,
-            activity_key=activity_key,
-            case_id_key=case_id_key,
-            timestamp_key=timestamp_key
-        )
+        variants = profile.variants()
 
         sorted_variants = sorted(variants.items(), key=lambda x: x[1], reverse=True)
         total_count = sum([count for _, count in sorted_variants])
@@ -169,16 +144,13 @@ def plot_absolute_case_frequency(df, case_id_key, activity_key, timestamp_key):
         y_values = [count for _, count in selected_variants]
         variant_mapping = dict(zip(x_labels, [variant for variant, _ in selected_variants]))
 
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.bar(x_labels, y_values, color="skyblue", edgecolor='black')
-        ax.set_xlabel("Variants (sorted by frequency)")
-        ax.set_ylabel("Frequency")
         if full_variant_count > 10:
             title = "Absolute Case Frequency Histogram (showing the most frequent cases in the log)"
         else:
             title = "Absolute Case Frequency Histogram (showing 80% of cases in the log)"
-        ax.set_title(title)
-        plt.xticks(rotation=45, ha="right")
+
+        inputs = dict(labels=x_labels, values=y_values, title=title, xlabel="Variants (sorted by frequency)",
+                      ylabel="Frequency", figsize=(12, 6))
 
         st.markdown("### Legend")
         for label, variant in variant_mapping.items():
@@ -194,7 +166,7 @@ def plot_absolute_case_frequency(df, case_id_key, activity_key, timestamp_key):
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="absolute_case_frequency",
             title="Top 80% Frequent Case Variants",
             fb_key="feedback_absolute_case_frequency",
@@ -205,14 +177,9 @@ def plot_absolute_case_frequency(df, case_id_key, activity_key, timestamp_key):
         st.warning(f"Could not render case frequency graph: {e}")
 
 # Generating relative case frequency plot within frequency & distribution analysis
-def plot_relative_case_frequency(df, case_id_key, activity_key, timestamp_key):
+def plot_relative_case_frequency(profile):
     try:
-        stochastic_language = pm4py.get_stochastic_language(
-            df,
-            activity_key=activity_key,
-            case_id_key=case_id_key,
-            timestamp_key=timestamp_key
-        )
+        stochastic_language = profile.stochastic_language()
 
         sorted_variants = sorted(stochastic_language.items(), key=lambda x: x[1], reverse=True)
 
@@ -236,16 +203,13 @@ def plot_relative_case_frequency(df, case_id_key, activity_key, timestamp_key):
         y_values = [round(prob * 100, 2) for _, prob in selected_variants]  
         variant_mapping = dict(zip(x_labels, [variant for variant, _ in selected_variants]))
 
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.bar(x_labels, y_values, color="lightsalmon", edgecolor='black')
-        ax.set_xlabel("Variants (sorted by probability)")
-        ax.set_ylabel("Relative Frequency (%)")
         if full_variant_count > 10:
             title = "Relative Case Frequency Histogram (showing the most frequent cases in the log)"
         else:
             title = "Relative Case Frequency Histogram (showing 80% of cases in the log)"
-        ax.set_title(title)    
-        plt.xticks(rotation=45, ha="right")
+
+        inputs = dict(labels=x_labels, values=y_values, title=title, xlabel="Variants (sorted by probability)",
+                      ylabel="Relative Frequency (%)", color="lightsalmon", figsize=(12, 6))
 
         st.markdown("### Legend")
         for label, variant in variant_mapping.items():
@@ -264,7 +228,7 @@ def plot_relative_case_frequency(df, case_id_key, activity_key, timestamp_key):
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="relative_case_frequency",
             title="Top 80% Case Variants by Relative Frequency",
             fb_key="feedback_relative_case_frequency",
@@ -275,23 +239,12 @@ def plot_relative_case_frequency(df, case_id_key, activity_key, timestamp_key):
         st.warning(f"Could not render relative case frequencies: {e}")
 
 # Generating case length distribution plot within frequency & distribution analysis
-def plot_case_length_distribution(df, case_id_key, activity_key, timestamp_key):
+def plot_case_length_distribution(profile):
     try:
-        variants = pm4py.get_variants(
-            df,
-            activity_key= activity_key,
-            case_id_key = case_id_key,
-            timestamp_key = timestamp_key
-        )
+        counts_per_length = np.bincount(profile.case_lengths)
 
-        counts_per_case = Counter()
-
-        for variant, count in variants.items():
-            length = len(variant)
-            counts_per_case[length] += count
-        
-        total_cases = sum(counts_per_case.values())
-        sorted_lengths_counts = sorted(counts_per_case.items(), key = lambda x: x[0])
+        total_cases = profile.n_cases
+        sorted_lengths_counts = [(int(length), int(counts_per_length[length])) for length in np.flatnonzero(counts_per_length)]
 
         max_lengths = 20
 
@@ -307,15 +260,8 @@ def plot_case_length_distribution(df, case_id_key, activity_key, timestamp_key):
         sorted_lengths = [length for length, _ in shown_lengths_counts]
         counts = [count for _, count in shown_lengths_counts]
 
-        fig, ax = plt.subplots(figsize=(10,6))
-        ax.bar(sorted_lengths, counts, color='skyblue', edgecolor='black')
-        ax.set_xlabel("Number activities per case")
-        ax.set_ylabel("Number of Cases")
-        title = 'Distribution of number of activities per case'
-        ax.set_title(title)
-        ax.set_xticks(sorted_lengths)
-        ax.grid(axis='y', linestyle='--', alpha=0.7)
-        fig.tight_layout()
+        inputs = dict(x=sorted_lengths, counts=counts, title='Distribution of number of activities per case',
+                      xlabel="Number activities per case", ylabel="Number of Cases")
 
         if hidden_percentage > 0:
             st.caption(f"{hidden_percentage}% of cases with less frequent case lengths are not shown in the plot.")
@@ -330,7 +276,7 @@ def plot_case_length_distribution(df, case_id_key, activity_key, timestamp_key):
         })
 
         finalize_plot(
-            fig,
+            charts.count_bar_chart, inputs,
             viz_key="case_length_distribution",
             title="Distribution of Case Lengths",
             fb_key="feedback_case_length_distribution",
@@ -341,46 +287,31 @@ def plot_case_length_distribution(df, case_id_key, activity_key, timestamp_key):
         st.warning(f"Could not render the case length distribution graph: {e}")
 
 # Generating absolute resource frequency plot within resource analysis
-def plot_absolute_resource_frequency(df, resource_key):
+def plot_absolute_resource_frequency(resources):
     try:
-        resource_counts = Counter(df[resource_key])
-        sorted_resources = sorted(resource_counts.items(), key=lambda x: x[1], reverse=True)
-
         max_resources = 20
-        if len(sorted_resources) > max_resources:
-            top_resources = sorted_resources[:max_resources]
-            hidden_resources = sorted_resources[max_resources:]
-            st.info(f"Showing top {max_resources} of {len(resource_counts)} resources.")
-        else:
-            top_resources = sorted_resources
-            hidden_resources = []
-
-        resources, frequencies = zip(*top_resources)
+        top = resources.top(max_resources)
+        if resources.n_values > max_resources:
+            st.info(f"Showing top {max_resources} of {resources.n_values} resources.")
 
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.bar(range(len(resources)), frequencies, color="skyblue", edgecolor='black')
-        ax.set_xticks(range(len(resources)))
-        ax.set_xticklabels(resources, rotation=45, ha="right")
-        ax.set_xlabel("Resources")
-        ax.set_ylabel("Frequency")
         title = "Absolute Frequency of Resources"
-        ax.set_title(title)
 
-        if hidden_resources:
-            hidden_text = ", ".join([f"{res} ({count})" for res, count in hidden_resources])
-            st.caption(f"Not shown in chart: {hidden_text}")
+        inputs = dict(labels=list(resources.labels[top]), values=resources.counts[top].tolist(), title=title,
+                      xlabel="Resources", ylabel="Frequency")
+
+        _hidden_caption(resources, max_resources, "resources")
 
         set_viz_meta("resource_frequency_absolute", {
             "type": "bar_chart",
             "title": title,
             "x_axis": "Resources",
             "y_axis": "Frequency",
-            "top_resources": dict(sorted_resources[:5]),
-            "total_events": int(sum(resource_counts.values()))
+            "top_resources": dict(resources.items(top[:5])),
+            "total_events": resources.total
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="resource_frequency_absolute",
             title=title,
             fb_key="feedback_absolute_resource_frequency",
@@ -391,54 +322,32 @@ def plot_absolute_resource_frequency(df, resource_key):
         st.warning(f"Could not render absolute resource frequencies: {e}")
 
 # Generating relative resource frequency plot within resource analysis
-def plot_relative_resource_frequency(df, resource_key):
+def plot_relative_resource_frequency(resources):
     try:
-        resource_counts = Counter(df[resource_key])
-        total_resources = sum(resource_counts.values())
-        relative_resource_freq = {
-            resource: (count / total_resources) * 100
-            for resource, count in resource_counts.items()
-        }
-
-        sorted_resources = sorted(relative_resource_freq.items(), key=lambda x: x[1], reverse=True)
-
         max_resources = 20
-        if len(sorted_resources) > max_resources:
-            top_resources = sorted_resources[:max_resources]
-            hidden_resources = sorted_resources[max_resources:]
-            st.info(f"Showing top {max_resources} of {len(resource_counts)} resources.")
-
-        else:
-            top_resources = sorted_resources
-            hidden_resources = []
+        top = resources.top(max_resources)
+        if resources.n_values > max_resources:
+            st.info(f"Showing top {max_resources} of {resources.n_values} resources.")
 
-        resources, percentages = zip(*top_resources)
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.bar(range(len(resources)), percentages, color="lightsalmon", edgecolor='black')
-        ax.set_xticks(range(len(resources)))
-        ax.set_xticklabels(resources, rotation=45, ha="right")
-
-        ax.set_xlabel("Resources")
-        ax.set_ylabel("Relative Frequency (%)")
+        percentages = resources.shares(top)
         title = "Relative Frequency of Resources"
-        ax.set_title(title)
 
-        if hidden_resources:
-            hidden_text = ", ".join([f"{res} ({round(freq, 2)}%)" for res, freq in hidden_resources])
-            st.caption(f"Not shown in chart: {hidden_text}")
+        inputs = dict(labels=list(resources.labels[top]), values=percentages.tolist(), title=title,
+                      xlabel="Resources", ylabel="Relative Frequency (%)", color="lightsalmon")
+
+        _hidden_caption(resources, max_resources, "resources", relative=True)
 
         set_viz_meta("relative_resource_frequency", {
             "type": "bar_chart",
             "title": title,
             "x_axis": "Resources",
             "y_axis": "Relative Frequency (%)",
-            "top_resources": {r: round(p, 2) for r, p in sorted_resources[:5]},
-            "total_events": int(total_resources)
+            "top_resources": {resources.labels[c]: round(float(p), 2) for c, p in zip(top[:5], percentages)},
+            "total_events": resources.total
         })
 
         finalize_plot(
-            fig,
+            charts.bar_chart, inputs,
             viz_key="relative_resource_frequency",
             title=title,
             fb_key="feedback_relative_resource_frequency",
@@ -449,165 +358,171 @@ def plot_relative_resource_frequency(df, resource_key):
         st.warning(f"Could not render relative resource frequencies: {e}")
 
 # Generating events per time plot within temporal analysis
-def plot_events_per_time_graph(df, case_id_key, activity_key, timestamp_key):
-    try: 
-        file_path = 'events_per_time_graph.png'
-        pm4py.vis.save_vis_events_per_time_graph(
-            df,
-            file_path = file_path,
-            case_id_key = case_id_key,
-            activity_key = activity_key,
-            timestamp_key = timestamp_key
-        )
+def plot_events_per_time_graph(log):
+    try:
+        series = events_over_time(log)
+        if series is None:
+            st.info("The event log has no events to plot over time.")
+            return
+        times, counts = series.downsampled()
+        title = "Events over time"
 
-        st.image(file_path, caption= 'Events over Time')
-        register_png_file_path(file_path, key="events_per_time_graph", title="Events over time")
+        inputs = dict(times=times, values=counts, title=title, xlabel="Time",
+                      ylabel=f"Number of Events per {series.bucket}")
 
+        peak = int(np.argmax(series.counts))
         set_viz_meta("events_per_time_graph", {
-            "type": "image",
-            "title": "Events over time",
+            "type": "line_chart",
+            "title": title,
             "x_axis": "Time",
-            "y_axis": "Number of Events",
-            "description": "Aggregated events per time slice (pm4py default)."
+            "y_axis": f"Number of Events per {series.bucket}",
+            "description": f"Events counted per {series.bucket} ({series.n_buckets} buckets).",
+            "peak": {"bucket_start": str(series.starts[peak]), "events": int(series.counts[peak])},
+            "empty_buckets": int(np.count_nonzero(series.counts == 0)),
         })
 
-        fb_key = "feedback_events_per_time_graph"
-        fb_label = "Does the above visualization reflect your experience?"
-        feedback_input(fb_label, fb_key)
-        attach_text_to_visual("events_per_time_graph", fb_label, kind="feedback", from_input_key=fb_key)
+        finalize_plot(
+            charts.time_series_chart, inputs,
+            viz_key="events_per_time_graph",
+            title=title,
+            fb_key="feedback_events_per_time_graph",
+            fb_label="Does the above visualization reflect your experience?"
+        )
     except Exception as e:
         st.warning(f"Could not render events per time graph: {e}")
 
-# Generating event distribution plot within temporal analysis
-def plot_event_distribution_graphs(df, case_id_key, activity_key, timestamp_key):
-    distr_types = [
-    "days_week",    # 0 = Monday, ..., 6 = Sunday
-    "days_month",   # 1–31
-    "months",       # 1–12
-    "years",        # Event years
-    "hours",        # 0–23
-    "weeks"         # 0–52
-    ]
-    
-    day_name_mapping = {
-    0: "Monday",
-    1: "Tuesday",
-    2: "Wednesday",
-    3: "Thursday",
-    4: "Friday",
-    5: "Saturday",
-    6: "Sunday"
-    }
-    for distr_type in distr_types:
-        try:
-            file_path = f"event_distribution_{distr_type}.png"
-            pm4py.vis.save_vis_events_distribution_graph(
-                df,
-                file_path = file_path,
-                activity_key = activity_key,
-                case_id_key = case_id_key,
-                timestamp_key = timestamp_key,
-                distr_type = distr_type,
-            )
+# Generating event distribution plots within temporal analysis
+def plot_event_distribution_graphs(log):
+    try:
+        distributions = compute_event_distributions(log)
+    except Exception as e:
+        st.warning(f"Could not compute event distributions: {e}")
+        return
 
-            st.image(file_path, caption=f"Events by {distr_type.replace('_',' ').title()}")
+    for distr_type, dist in distributions.items():
+        try:
             key = f"event_distribution_{distr_type}"
-            register_png_file_path(file_path, key=key, title=f"Events by {distr_type.replace('_',' ').title()}")
-
-            if distr_type == "days_week":
-                series = df[timestamp_key].dt.dayofweek
-                counter = Counter(series)
-                mapped = {day_name_mapping[k]: v for k, v in counter.items()}
-                x_label = "Day of Week"
-            elif distr_type == "days_month":
-                series = df[timestamp_key].dt.day
-                mapped = {int(k): int(v) for k, v in Counter(series).items()}
-                x_label = "Day of Month"
-            elif distr_type == "months":
-                series = df[timestamp_key].dt.month
-                mapped = {int(k): int(v) for k, v in Counter(series).items()}
-                x_label = "Month"
-            elif distr_type == "years":
-                series = df[timestamp_key].dt.year
-                mapped = {int(k): int(v) for k, v in Counter(series).items()}
-                x_label = "Year"
-            elif distr_type == "hours":
-                series = df[timestamp_key].dt.hour
-                mapped = {int(k): int(v) for k, v in Counter(series).items()}
-                x_label = "Hour of Day"
-            elif distr_type == "weeks":
-                # TODO: Search is isocalendar() starts with 0
-                mapped = {int(k): int(v) for k, v in Counter(series).items()}
-                x_label = "ISO Week"
+            title = f"Events by {dist.x_label}"
+            inputs = dict(labels=[str(label) for label in dist.labels], values=dist.counts.tolist(),
+                          title=title, xlabel=dist.x_label, ylabel="Number of Events",
+                          rotation=45 if distr_type == "days_week" else (0 if len(dist.labels) <= 24 else 90))
 
             set_viz_meta(key, {
                 "type": "bar_chart",
                 "title": f"Event distribution by {distr_type.replace('_',' ')}",
-                "x_axis": x_label,
+                "x_axis": dist.x_label,
                 "y_axis": "Number of Events",
-                "distribution": mapped
+                "distribution": {label: count for label, count in dist.as_dict().items() if count}
             })
 
-            fb_key = f"feedback_event_distribution_{distr_type}"
-            fb_label = f"Does the above visualization reflect your experience?"
-            feedback_input(fb_label, fb_key)
-            attach_text_to_visual(f"event_distribution_{distr_type}", fb_label, kind="feedback", from_input_key=fb_key)
-                
+            finalize_plot(
+                charts.bar_chart, inputs,
+                viz_key=key,
+                title=title,
+                fb_key=f"feedback_event_distribution_{distr_type}",
+                fb_label="Does the above visualization reflect your experience?"
+            )
+
         except Exception as e:
             st.warning(f"Could not render event distribution graph for '{distr_type}': {e}")
 
-# Generating case duration plot within performance analysis
-def plot_case_duration_graph(case_id_key, activity_key, timestamp_key):
+# Generating the (rasterized) dotted chart within temporal analysis
+@st.fragment
+def plot_dotted_chart(log):
+    """Events binned by (time, case) into a density image; the time window slider re-bins (zoom)."""
     try:
-        df_fmt = pm4py.format_dataframe(st.session_state.df_raw, case_id = case_id_key, activity_key = activity_key, timestamp_key= timestamp_key)
-        file_path = 'case_duration_graph.png'
-        pm4py.vis.save_vis_case_duration_graph(
-            df_fmt,
-            file_path = file_path,
-            activity_key = activity_key,
-            case_id_key = case_id_key,
-            timestamp_key = timestamp_key
+        full = dotted_chart_grid(log)
+        if full is None:
+            st.info("The event log has no events for a dotted chart.")
+            return
+
+        first, last = pd.Timestamp(full.start).to_pydatetime(), pd.Timestamp(full.end).to_pydatetime()
+        window = (full.start, full.end)
+        if last > first:
+            step = timedelta(minutes=max(1, int((last - first).total_seconds() // 60 // 300)))
+            lo, hi = st.slider("Time window of the dotted chart", min_value=first, max_value=last,
+                               value=(first, last), step=step, key="dotted_chart_window")
+            window = (pd.Timestamp(lo).value, pd.Timestamp(hi).value)
+
+        grid = full if window == (full.start, full.end) else dotted_chart_grid(log, window)
+        if grid is None:
+            st.info("No events in the selected time window.")
+            return
+
+        title = "Dotted chart (event density)"
+        inputs = dict(counts=grid.counts, x_start=np.datetime64(grid.start, "ns"), x_end=np.datetime64(grid.end, "ns"),
+                      y_start=grid.first_case + 1, y_end=grid.last_case + 1, title=title, xlabel="Time",
+                      ylabel="Cases (ordered by first event)", cbar_label="Events per cell")
+
+        busiest = int(np.argmax(grid.counts.sum(axis=0)))
+        set_viz_meta("dotted_chart", {
+            "type": "density_chart",
+            "title": title,
+            "x_axis": "Time",
+            "y_axis": "Cases (ordered by first event)",
+            "description": "Events binned by time and case, colored on the viridis scale: dark purple cells hold few "
+                           "events, yellow cells many; empty cells are white.",
+            "window": [str(pd.Timestamp(grid.start)), str(pd.Timestamp(grid.end))],
+            "events": grid.n_events,
+            "cases": grid.n_cases,
+            "busiest_period_start": str(pd.Timestamp(grid.time_bin_start(busiest))),
+        })
+
+        finalize_plot(
+            charts.density_chart, inputs,
+            viz_key="dotted_chart",
+            title=title,
+            fb_key="feedback_dotted_chart",
+            fb_label="Does the above visualization reflect your experience?",
+            params=window,
         )
-        st.image('case_duration_graph.png', caption = 'Case durations within the data')
-        
-        register_png_file_path(file_path, key="case_duration_graph", title="Case durations")
+    except Exception as e:
+        st.warning(f"Could not render the dotted chart: {e}")
+
+# Generating case duration plot within performance analysis
+def plot_case_duration_graph(durations):
+    try:
+        counts, edges = durations.histogram()
+        median = durations.percentiles(q=(50,))[50]
+
+        inputs = dict(edges=edges.tolist(), counts=counts.tolist(), title="Case durations within the data",
+                      xlabel="Case duration [Days]", ylabel="Number of Cases",
+                      marker=median, marker_label=f"Median: {median:.2f} days")
 
         set_viz_meta("case_duration_graph", {
-            "type": "image",
+            "type": "histogram",
             "title": "Case durations",
-            "x_axis": "Cases",
-            "y_axis": "Duration",
-            "description": "Distribution of case durations."
+            "x_axis": "Duration [Days]",
+            "y_axis": "Number of Cases",
+            "description": "Distribution of case durations.",
+            "bins": [
+                {"from_days": round(float(lo), 2), "to_days": round(float(hi), 2), "cases": int(c)}
+                for lo, hi, c in zip(edges[:-1], edges[1:], counts) if c
+            ][:30],
         })
 
-        fb_key = "feedback_case_duration"
-        fb_label = "Does the above visualization reflect your experience?"
-        feedback_input(fb_label, fb_key)
-        attach_text_to_visual("case_duration_graph", fb_label, kind="feedback", from_input_key=fb_key)
+        finalize_plot(
+            charts.histogram_chart, inputs,
+            viz_key="case_duration_graph",
+            title="Case durations",
+            fb_key="feedback_case_duration",
+            fb_label="Does the above visualization reflect your experience?"
+        )
 
     except Exception as e:
         st.warning (f"Could not render the case duration graph: {e}")
 
-# Generating case duration plot within performance analysis
-def retrieve_max_min_avg_case_duration(case_id_key, activity_key, timestamp_key):
-    
-    df_fmt = pm4py.format_dataframe(st.session_state.df_raw, case_id = case_id_key, activity_key = activity_key, timestamp_key= timestamp_key)
-
-    case_durations = pm4py.stats.get_all_case_durations(
-        df_fmt,
-        activity_key = activity_key,
-        case_id_key = case_id_key,
-        timestamp_key = timestamp_key
-    )
-
-    case_durations = np.array(case_durations, dtype=float)
-
-    case_durations_days = (case_durations / 3600) / 24
+# Generating case duration statistics within performance analysis
+def retrieve_max_min_avg_case_duration(durations):
+    summary = durations.stats()
+    pct = durations.percentiles(q=(50, 90))
     stats = {
-        'Minimum Case Length [Day]': round(float(case_durations_days.min()), 2),
-        'Maximum Case Length [Day]': round(float(case_durations_days.max()), 2),
-        'Average Case Length [Day]': round(float(case_durations_days.mean()), 2),
-        'Standard Deviation Case Length [Day]': round(float(case_durations_days.std()), 2),
+        'Minimum Case Length [Day]': round(summary["min"], 2),
+        'Maximum Case Length [Day]': round(summary["max"], 2),
+        'Average Case Length [Day]': round(summary["mean"], 2),
+        'Standard Deviation Case Length [Day]': round(summary["std"], 2),
+        'Median Case Length [Day]': round(pct[50], 2),
+        '90th Percentile Case Length [Day]': round(pct[90], 2),
     }
 
     set_viz_meta("case_duration_facts", {
@@ -623,36 +538,45 @@ def retrieve_max_min_avg_case_duration(case_id_key, activity_key, timestamp_key)
 
     fb_key = "feedback_case_duration_facts"
     fb_label = "Do the above statistics reflect your experience?"
-    feedback_input(fb_label, fb_key)
-    attach_text_to_visual("case_duration_facts_tbl", fb_label, kind="feedback", from_input_key=fb_key)
+    feedback_input(fb_label, fb_key, viz_key="case_duration_facts_tbl")
     
     return df_stats
 
 # Generating task responsibility heatmap within resource analysis
-def plot_task_responsbility_overview(df, activity_key, resource_key):
-    top_activities = df[activity_key].value_counts().nlargest(20).index
-    if df[activity_key].nunique() > 20:
-        st.info(f"Showing top 20 of {df[activity_key].nunique()} activities.")
-
-    top_resources = df[resource_key].value_counts().nlargest(20).index
-    if df[resource_key].nunique() > 20:
-        st.info(f"Showing top 20 of {df[resource_key].nunique()} resources.")
-    
-    filtered_df = df[df[activity_key].isin(top_activities) & df[resource_key].isin(top_resources)]
-
-    heatmap = pd.crosstab(filtered_df[activity_key], filtered_df[resource_key])
+def plot_task_responsbility_overview(log, activities, resources):
+    top_activities = activities.top(20)
+    if activities.n_values > 20:
+        st.info(f"Showing top 20 of {activities.n_values} activities.")
+
+    top_resources = resources.top(20)
+    if resources.n_values > 20:
+        st.info(f"Showing top 20 of {resources.n_values} resources.")
+
+    # Cross-tabulation on codes: map the top codes to local positions and count the pairs
+    act_pos = np.full(log.n_activities, -1, dtype=np.int64)
+    act_pos[top_activities] = np.arange(len(top_activities))
+    res_pos = np.full(log.n_resources, -1, dtype=np.int64)
+    res_pos[top_resources] = np.arange(len(top_resources))
+    rows, cols = act_pos[log.activity_codes], res_pos[log.resource_codes]
+    keep = (rows >= 0) & (cols >= 0)
+    pair_counts = np.bincount(
+        rows[keep] * len(top_resources) + cols[keep], minlength=len(top_activities) * len(top_resources)
+    ).reshape(len(top_activities), len(top_resources))
+
+    heatmap = pd.DataFrame(
+        pair_counts,
+        index=pd.Index(log.activity_labels[top_activities], name="Activity"),
+        columns=pd.Index(log.resource_labels[top_resources], name="Resource"),
+    )
+    heatmap = heatmap.loc[heatmap.sum(axis=1) > 0, heatmap.sum(axis=0) > 0].sort_index().sort_index(axis=1)
     heatmap_percent = heatmap.div(heatmap.sum(axis=1), axis=0) * 100
     heatmap_percent = heatmap_percent.round(2)
 
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.heatmap(heatmap_percent, annot=True, fmt=".1f", cmap="YlGnBu",
-                linewidths=0.5, cbar_kws={'label': 'Activity share (%)'})
-    ax.set_xlabel("Resource")
-    ax.set_ylabel("Activity")
     title = "Heatmap: Activity-Resource Distribution (%)"
-    ax.set_title(title)
-    plt.xticks(rotation=45, ha='right')
-    fig.tight_layout()
+
+    inputs = dict(values=heatmap_percent.to_numpy(), row_labels=list(heatmap_percent.index),
+                  col_labels=list(heatmap_percent.columns), title=title, xlabel="Resource",
+                  ylabel="Activity", cbar_label='Activity share (%)')
 
     top_cells = (
         heatmap_percent.stack()
@@ -672,24 +596,22 @@ def plot_task_responsbility_overview(df, activity_key, resource_key):
     })
 
     finalize_plot(
-            fig,
+            charts.heatmap_chart, inputs,
             viz_key="task_responsibility_overview",
             title=title,
             fb_key="feedback_task_responsibility_overview",
             fb_label="Does the above visualization reflect your experience?"
         )
 
-def render_summary_statistics(df, case_id_key, activity_key, timestamp_key):
+def render_summary_statistics(df, log, profile):
     summary = {}
 
-    summary["Total Events"] = len(df)
-    summary["Number of cases"] = df[case_id_key].nunique()
+    summary["Total Events"] = log.n_events
+    summary["Number of cases"] = log.n_cases
 
-    variants = pm4py.get_variants(df, activity_key=activity_key, case_id_key=case_id_key, timestamp_key=timestamp_key)
-    summary["Number of Variants"] = len(variants)
+    summary["Number of Variants"] = profile.n_variants
 
-    df[timestamp_key] = pd.to_datetime(df[timestamp_key])
-    start_time, end_time = df[timestamp_key].min(), df[timestamp_key].max()
+    start_time, end_time = log.to_datetime([log.timestamps.min(), log.timestamps.max()])
     summary["Time Horizon"] = f"{start_time.strftime('%d/%m/%Y %H:%M:%S')} - {end_time.strftime('%d/%m/%Y %H:%M:%S')}"
 
     event_attrs = pm4py.get_event_attributes(df)
@@ -705,7 +627,7 @@ def render_summary_statistics(df, case_id_key, activity_key, timestamp_key):
         st.dataframe(df_summary, hide_index=True, use_container_width=True)
         fb_key = "feedback_summary_statistics"
         fb_label = "Do the above statistics reflect your experience?"
-        feedback_input(fb_label, fb_key)
+        feedback_input(fb_label, fb_key, viz_key="summary_statistics_tbl")
 
     set_viz_meta("summary_statistics", {"type": "table", "title": "Summary statistics", "values": summary})
 
@@ -716,39 +638,67 @@ def render_summary_statistics(df, case_id_key, activity_key, timestamp_key):
         title="Summary statistics",
         col_widths_cm=(6.0, 10.0)  
     )
-    attach_text_to_visual("summary_statistics_tbl", fb_label, kind="feedback", from_input_key="feedback_summary_statistics")
+
+# ---------- Analysis sections ----------
+
+def render_frequency_section(profile):
+    activities = profile.activity_frequencies()
+    plot_absolute_activity_frequency(activities)
+    plot_relative_activity_frequency(activities)
+    plot_absolute_case_frequency(profile)
+    plot_relative_case_frequency(profile)
+    plot_case_length_distribution(profile)
+
+def render_temporal_section(log):
+    plot_events_per_time_graph(log)
+    plot_event_distribution_graphs(log)
+    plot_dotted_chart(log)
+
+def render_performance_section(profile):
+    durations = compute_case_durations(profile)
+    retrieve_max_min_avg_case_duration(durations)
+    plot_case_duration_graph(durations)
+
+def render_resource_section(log, profile):
+    resources = profile.resource_frequencies()
+    if resources is None:
+        st.info("The event log has no resource column.")
+        return
+    plot_absolute_resource_frequency(resources)
+    plot_relative_resource_frequency(resources)
+    plot_task_responsbility_overview(log, profile.activity_frequencies(), resources)
+
+@st.fragment
+def lazy_section(label, key, render, *args):
+    """
+    Render an analysis section only while its toggle is on.
+    The toggle lives inside the fragment, so switching it reruns this section only; sections
+    that stay off cost nothing on a rerun. Switching a section off removes its visuals from the
+    export and the chatbot context again (see unregister_viz).
+    """
+    # Switched-on section -> keys of its visuals; kept outside the toggle, whose widget state
+    # Streamlit drops while another page is shown
+    sections = st.session_state.setdefault("section_viz_keys", {})
+    toggle_key = f"show_section_{key}"
+    if toggle_key not in st.session_state and key in sections:
+        st.session_state[toggle_key] = True
+    if st.toggle(label, key=toggle_key):
+        before = registered_viz_keys()
+        with st.container(border=True), render_batch():
+            render(*args)
+        sections[key] = sections.get(key, set()) | (registered_viz_keys() - before)
+    elif key in sections:
+        unregister_viz(sections.pop(key))
 
 # ---------- Public entry point ----------
 
 # Run all the visualizations
-def run_visualizations(df, case_id_key, activity_key, timestamp_key, resource_key):
-    """Main entry: renders all plots, captures feedback, stores metadata; API-compatible."""
+def run_visualizations(df, log, profile, case_id_key, activity_key, timestamp_key, resource_key):
+    """Main entry: renders the summary and the analysis sections the user switched on."""
     # --- Summary statistics (metadata only, shown as table in UI) ---
-    render_summary_statistics(df, case_id_key, activity_key, timestamp_key)
-
-    # --- Frequency & distribution analysis ---
-    with st.expander("🔁 Frequency & Distribution Analysis"):
-        plot_absolute_activity_frequency(df, activity_key)
-        plot_relative_activity_frequency(df, activity_key)
-        plot_absolute_case_frequency(df, case_id_key, activity_key, timestamp_key)
-        plot_relative_case_frequency(df, case_id_key, activity_key, timestamp_key)
-        plot_case_length_distribution(df, case_id_key, activity_key, timestamp_key)
-
-    # --- Temporal analysis ---
-    with st.expander("🕒 Temporal Analysis"):
-        plot_events_per_time_graph(df, case_id_key, activity_key, timestamp_key)
-        plot_event_distribution_graphs(df, case_id_key, activity_key, timestamp_key)
-        
-    # --- Performance analysis ---
-    with st.expander("⚡ Performance Analysis"):
-        retrieve_max_min_avg_case_duration(case_id_key, activity_key, timestamp_key)
-        plot_case_duration_graph(case_id_key, activity_key, timestamp_key)
-
-    # --- Resource analysis ---
-    with st.expander("👥 Resource analysis"):
-        plot_absolute_resource_frequency(df, resource_key)
-        plot_relative_resource_frequency(df, resource_key)
-        plot_task_responsbility_overview(df, activity_key, resource_key)
-
+    render_summary_statistics(df, log, profile)
 
-    
\ No newline at end of file
+    lazy_section("🔁 Frequency & Distribution Analysis", "frequency", render_frequency_section, profile)
+    lazy_section("🕒 Temporal Analysis", "temporal", render_temporal_section, log)
+    lazy_section("⚡ Performance Analysis", "performance", render_performance_section, profile)
+    lazy_section("👥 Resource analysis", "resource", render_resource_section, log, profile)